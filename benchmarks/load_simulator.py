@@ -0,0 +1,331 @@
+"""Simulate the load of many tracked devices on the polygonal zones integration.
+
+A homeassistant core instance is started without any other integration, so
+only its state machine, event bus, entity registry and executor are used. The zones are
+generated (see `synthetic.py`) and served by a local HTTP server, from which
+a single `ZoneStore` loads them like it loads a remote zone file. Hundreds of
+`PolygonalZoneEntity` instances then each follow a tracker that walks around
+the zones and reports its location at a fixed rate.
+
+This reports:
+
+- the event loop lag: how late a short sleep on the event loop wakes up.
+- the update latency: the time from setting the state of a tracker, which
+  fires the state_changed event, until its entity wrote its new state.
+- the CPU time of the process per handled update, including the executor.
+
+The results are logged and written as JSON. Run it from the root of the
+repository:
+
+    python benchmarks/load_simulator.py --trackers 500 --rate 1 --duration 60
+"""
+
+import argparse
+import asyncio
+from datetime import timedelta
+import json
+import logging
+import math
+from pathlib import Path
+import platform
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import (
+    device_registry as dr,
+    entity,
+    entity_registry as er,
+)
+from homeassistant.helpers.entity_platform import EntityPlatform
+
+from custom_components.polygonal_zones.const import DOMAIN, PLATFORM
+from custom_components.polygonal_zones.device_tracker import (
+    PolygonalZoneEntity,
+)
+from custom_components.polygonal_zones.utils.zone_set import (
+    INDEX_STRTREE,
+    INDEXES,
+)
+from custom_components.polygonal_zones.utils.zone_store import ZoneStore
+from synthetic import (
+    LAYOUT_OVERLAPPING,
+    LAYOUTS,
+    generate_zones,
+    get_extent,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# The interval at which the event loop lag is sampled in seconds.
+LAG_INTERVAL = 0.05
+# The meters in a degree of latitude.
+METERS_PER_DEGREE = 111320
+# The version of the layout of the results file.
+RESULTS_VERSION = 1
+
+
+class Tracker:
+    """A device walking around the zones in a random direction.
+
+    The direction changes a little at every step and the tracker turns back
+    at the edge of the area of the zones.
+    """
+
+    def __init__(
+        self,
+        entity_id: str,
+        extent: tuple[float, float, float, float],
+        speed: float,
+        rng: np.random.Generator,
+    ):
+        """Initialize the tracker at a random location in the extent."""
+        self.entity_id = entity_id
+        self._extent = extent
+        self._speed = speed
+        self._rng = rng
+        self.lon = rng.uniform(extent[0], extent[2])
+        self.lat = rng.uniform(extent[1], extent[3])
+        self._heading = rng.uniform(0, 2 * math.pi)
+        self._accuracy = rng.uniform(5, 50)
+
+    def step(self, seconds: float) -> dict:
+        """Move the tracker and get the attributes of its new location."""
+        self._heading += self._rng.normal(0, 0.3)
+        distance = self._speed * seconds / METERS_PER_DEGREE
+        self.lat += distance * math.cos(self._heading)
+        self.lon += (
+            distance * math.sin(self._heading) / math.cos(math.radians(self.lat))
+        )
+
+        minx, miny, maxx, maxy = self._extent
+        if not (minx <= self.lon <= maxx and miny <= self.lat <= maxy):
+            self._heading += math.pi
+            self.lon = min(max(self.lon, minx), maxx)
+            self.lat = min(max(self.lat, miny), maxy)
+
+        return {
+            "latitude": self.lat,
+            "longitude": self.lon,
+            "gps_accuracy": max(self._accuracy + self._rng.normal(0, 2), 1),
+        }
+
+
+class Recorder:
+    """The samples collected while the simulation runs."""
+
+    def __init__(self):
+        """Initialize the recorder."""
+        self.sent: dict[str, float] = {}
+        self.latencies: list[float] = []
+        self.lags: list[float] = []
+        self.updates_sent = 0
+
+    def wrap_entity(self, entity: PolygonalZoneEntity, tracker_id: str) -> None:
+        """Record the latency every time the entity writes its state."""
+        write_state = entity.async_write_ha_state
+
+        def async_write_ha_state() -> None:
+            write_state()
+            sent = self.sent.pop(tracker_id, None)
+            if sent is not None:
+                self.latencies.append(time.perf_counter() - sent)
+
+        entity.async_write_ha_state = async_write_ha_state
+
+    async def sample_lag(self, stop: asyncio.Event) -> None:
+        """Sample the event loop lag until the simulation stops."""
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags.append(time.perf_counter() - start - LAG_INTERVAL)
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    """Get the percentiles of samples in seconds, in milliseconds."""
+    if not samples:
+        return {}
+    values = np.asarray(samples) * 1000
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p90_ms": float(np.percentile(values, 90)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+
+async def _serve_zones(collection: dict) -> tuple[web.AppRunner, str]:
+    """Serve the zones on a local HTTP server, returning the uri of the file."""
+    body = json.dumps(collection)
+
+    async def handler(_request: web.Request) -> web.Response:
+        return web.Response(text=body, content_type="application/json")
+
+    app = web.Application()
+    app.router.add_get("/zones.json", handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}/zones.json"
+
+
+async def _drive(
+    hass: HomeAssistant,
+    trackers: list[Tracker],
+    rate: float,
+    duration: float,
+    recorder: Recorder,
+) -> None:
+    """Send the locations of the trackers in turn, at `rate` per tracker.
+
+    The updates are scheduled by the clock, so a slow event loop sends the
+    missed updates late instead of lowering the offered load.
+    """
+    interval = 1 / (rate * len(trackers))
+    start = time.perf_counter()
+    sent = 0
+    while (elapsed := time.perf_counter() - start) < duration:
+        due = int(elapsed / interval) + 1
+        for idx in range(sent, due):
+            tracker = trackers[idx % len(trackers)]
+            attributes = tracker.step(1 / rate)
+            recorder.sent[tracker.entity_id] = time.perf_counter()
+            hass.states.async_set(tracker.entity_id, "not_home", attributes)
+        recorder.updates_sent += due - sent
+        sent = due
+        await asyncio.sleep(max(sent * interval - (time.perf_counter() - start), 0))
+
+
+async def simulate(args: argparse.Namespace) -> dict:
+    """Run the simulation and collect the results."""
+    collection = generate_zones(args.zones, args.vertices, args.layout, args.seed)
+    extent = get_extent(args.zones)
+    runner, uri = await _serve_zones(collection)
+    del collection
+
+    rng = np.random.default_rng(args.seed)
+    recorder = Recorder()
+    entities = []
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        await hass.async_start()
+        await dr.async_load(hass)
+        await er.async_load(hass)
+        entity.async_setup(hass)
+        tracker_platform = EntityPlatform(
+            hass=hass,
+            logger=_LOGGER,
+            domain=PLATFORM,
+            platform_name=DOMAIN,
+            platform=None,
+            scan_interval=timedelta(seconds=30),
+            entity_namespace=None,
+        )
+        try:
+            store = ZoneStore(hass, [uri], False, args.index)
+            start = time.perf_counter()
+            await store.async_get_zones()
+            load_time = time.perf_counter() - start
+
+            trackers = []
+            for idx in range(args.trackers):
+                tracker = Tracker(f"device_tracker.sim_{idx}", extent, args.speed, rng)
+                hass.states.async_set(
+                    tracker.entity_id, "not_home", tracker.step(1 / args.rate)
+                )
+                zone_entity = PolygonalZoneEntity(
+                    tracker.entity_id,
+                    "simulation",
+                    store,
+                    f"device_tracker.polygonal_zones_sim_{idx}",
+                    False,
+                )
+                recorder.wrap_entity(zone_entity, tracker.entity_id)
+                trackers.append(tracker)
+                entities.append(zone_entity)
+            await tracker_platform.async_add_entities(entities)
+            await hass.async_block_till_done()
+            recorder.sent.clear()
+            recorder.latencies.clear()
+
+            stop = asyncio.Event()
+            lag_task = hass.async_create_task(recorder.sample_lag(stop))
+            cpu_start = time.process_time()
+            await _drive(hass, trackers, args.rate, args.duration, recorder)
+            stop.set()
+            await lag_task
+            await hass.async_block_till_done()
+            cpu = time.process_time() - cpu_start
+
+            await tracker_platform.async_reset()
+        finally:
+            await hass.async_stop(force=True)
+            await runner.cleanup()
+
+    handled = len(recorder.latencies)
+    fast_path = sum(zone._fast_path_hits for zone in entities)
+    return {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "parameters": vars(args) | {"output": str(args.output)},
+        "zone_load_s": load_time,
+        "updates_sent": recorder.updates_sent,
+        "updates_handled": handled,
+        "fast_path_fraction": fast_path / max(handled, 1),
+        "cpu_ms_per_update": cpu * 1000 / max(handled, 1),
+        "loop_lag": _percentiles(recorder.lags),
+        "update_latency": _percentiles(recorder.latencies),
+    }
+
+
+def main() -> None:
+    """Run the simulation from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trackers", type=int, default=300)
+    parser.add_argument(
+        "--rate", type=float, default=1.0, help="updates per second per tracker"
+    )
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--speed", type=float, default=1.4, help="meters per second")
+    parser.add_argument("--zones", type=int, default=1000)
+    parser.add_argument("--vertices", type=int, default=16)
+    parser.add_argument("--layout", choices=LAYOUTS, default=LAYOUT_OVERLAPPING)
+    parser.add_argument("--index", choices=INDEXES, default=INDEX_STRTREE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output", type=Path, default=Path("load_simulation.json"), help="results"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # the entities log every change of zone and their registration
+    logging.getLogger("custom_components").setLevel(logging.WARNING)
+    logging.getLogger("homeassistant").setLevel(logging.WARNING)
+
+    results = asyncio.run(simulate(args))
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    _LOGGER.info(
+        "%d of %d updates handled, %.3f ms CPU per update",
+        results["updates_handled"],
+        results["updates_sent"],
+        results["cpu_ms_per_update"],
+    )
+    _LOGGER.info("Update latency: %s", results["update_latency"])
+    _LOGGER.info("Event loop lag: %s", results["loop_lag"])
+    _LOGGER.info("Results written to %s", args.output)
+
+
+if __name__ == "__main__":
+    main()
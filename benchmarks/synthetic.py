@@ -0,0 +1,121 @@
+"""Synthetic zone sets and GPS fixes for the polygonal zones benchmarks.
+
+Everything is generated from a seed, so the same arguments always give the
+same zones and fixes and results of different runs can be compared.
+"""
+
+import math
+
+import numpy as np
+
+# The south west corner of the generated zones (lon, lat).
+ORIGIN = (5.0, 52.0)
+# The size of the cell of a zone in degrees, about 1 km.
+CELL_SIZE = 0.01
+
+# The layouts of the generated zones.
+LAYOUT_DISJOINT = "disjoint"
+LAYOUT_OVERLAPPING = "overlapping"
+LAYOUT_NESTED = "nested"
+LAYOUTS = [LAYOUT_DISJOINT, LAYOUT_OVERLAPPING, LAYOUT_NESTED]
+
+# The amount of zones inside each other in the nested layout.
+NESTING_DEPTH = 3
+
+
+def _polygon(
+    rng: np.random.Generator, lon: float, lat: float, radius: float, vertices: int
+) -> list[list[float]]:
+    """Get the closed exterior ring of an irregular polygon around a center."""
+    angles = np.linspace(0, 2 * math.pi, vertices, endpoint=False)
+    radii = radius * rng.uniform(0.8, 1.0, vertices)
+    ring = np.column_stack(
+        [lon + radii * np.cos(angles), lat + radii * np.sin(angles)]
+    ).tolist()
+    return [*ring, ring[0]]
+
+
+def get_extent(count: int) -> tuple[float, float, float, float]:
+    """Get the (minx, miny, maxx, maxy) of the area covered by `count` zones."""
+    side = math.ceil(math.sqrt(count)) * CELL_SIZE
+    return ORIGIN[0], ORIGIN[1], ORIGIN[0] + side, ORIGIN[1] + side
+
+
+def generate_zones(count: int, vertices: int, layout: str, seed: int = 0) -> dict:
+    """Generate a FeatureCollection of zones.
+
+    The zones lie on a square grid of cells starting at `ORIGIN`:
+
+    - disjoint: a single zone in every cell, none of the zones touch.
+    - overlapping: zones at random positions that are up to three cells wide,
+      so most locations are in several zones, with random priorities.
+    - nested: `NESTING_DEPTH` zones inside each other in every cell, the
+      inner zones have a lower priority.
+
+    Args:
+        count: The amount of zones.
+        vertices: The amount of vertices of every zone.
+        layout: One of `LAYOUTS`.
+        seed: The seed of the random generator.
+
+    Returns:
+        The GeoJSON FeatureCollection of the zones.
+
+    Raises:
+        ValueError: If the layout is unknown.
+
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout: {layout}")
+
+    rng = np.random.default_rng(seed)
+    cells = count if layout != LAYOUT_NESTED else math.ceil(count / NESTING_DEPTH)
+    side = math.ceil(math.sqrt(cells))
+
+    features = []
+    for idx in range(count):
+        priority = 0
+        if layout == LAYOUT_OVERLAPPING:
+            lon, lat = rng.uniform(0, side, 2) * CELL_SIZE
+            radius = rng.uniform(0.3, 1.5) * CELL_SIZE
+            priority = int(rng.integers(0, 4))
+        else:
+            cell, level = divmod(idx, NESTING_DEPTH if layout == LAYOUT_NESTED else 1)
+            lon, lat = (np.array(divmod(cell, side)) + 0.5) * CELL_SIZE
+            radius = 0.45 * CELL_SIZE * (NESTING_DEPTH - level) / NESTING_DEPTH
+            if layout == LAYOUT_NESTED:
+                priority = NESTING_DEPTH - 1 - level
+
+        ring = _polygon(
+            rng, ORIGIN[0] + lon, ORIGIN[1] + lat, float(radius), max(vertices, 3)
+        )
+        features.append(
+            {
+                "type": "Feature",
+                "properties": {"name": f"zone_{idx}", "priority": priority},
+                "geometry": {"type": "Polygon", "coordinates": [ring]},
+            }
+        )
+    return {"type": "FeatureCollection", "features": features}
+
+
+def generate_fixes(
+    count: int, extent: tuple[float, float, float, float], seed: int = 0
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Generate GPS fixes spread uniformly over an area.
+
+    Args:
+        count: The amount of fixes.
+        extent: The (minx, miny, maxx, maxy) of the area.
+        seed: The seed of the random generator.
+
+    Returns:
+        The latitudes, longitudes and accuracies in meters of the fixes.
+
+    """
+    rng = np.random.default_rng(seed)
+    minx, miny, maxx, maxy = extent
+    lats = rng.uniform(miny, maxy, count)
+    lons = rng.uniform(minx, maxx, count)
+    accs = rng.uniform(5, 200, count)
+    return lats, lons, accs
@@ -0,0 +1,275 @@
+"""Benchmark the loading and lookup of zones of the polygonal zones integration.
+
+Synthetic zone files of increasing size are generated (see `synthetic.py`)
+and for every zone file and index this measures:
+
+- the time `get_zones` takes to parse the file, and to load it again from the
+  compiled copy of the file.
+- the latency percentiles and throughput of `get_locations_zone`, and the
+  throughput of `get_locations_zones` for the same fixes at once.
+- the memory used per zone.
+- the time `zones_to_geojson` takes and the size of its output.
+
+The benchmark runs offline, the zone files are written to a temporary config
+directory. The results are written as JSON, so the results of different
+releases can be compared. Run it from the root of the repository:
+
+    python benchmarks/zones_benchmark.py --output results.json
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+from pathlib import Path
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import shapely
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.polygonal_zones.utils.compiled_zones import (
+    COMPILED_DIR,
+)
+from custom_components.polygonal_zones.utils.local_zones import (
+    zones_to_geojson,
+)
+from custom_components.polygonal_zones.utils.zone_set import INDEXES
+from custom_components.polygonal_zones.utils.zones import (
+    get_locations_zone,
+    get_locations_zones,
+    get_zones,
+)
+from synthetic import LAYOUTS, generate_fixes, generate_zones, get_extent
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+DEFAULT_VERTICES = [8, 64]
+DEFAULT_LOOKUPS = 2000
+# The sizes used by --quick.
+QUICK_SIZES = [10, 100, 1000]
+# The version of the layout of the results file.
+RESULTS_VERSION = 1
+ZONE_FILE = "zones.json"
+
+
+def _rss_bytes() -> int | None:
+    """Get the resident memory of the process, None if it is not known."""
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    """Get the latency percentiles of samples in seconds, in microseconds."""
+    values = np.asarray(samples) * 1e6
+    return {
+        "p50_us": float(np.percentile(values, 50)),
+        "p90_us": float(np.percentile(values, 90)),
+        "p99_us": float(np.percentile(values, 99)),
+        "max_us": float(values.max()),
+    }
+
+
+async def _measure_load(hass: HomeAssistant, index: str) -> dict:
+    """Measure loading the zone file with and without its compiled copy."""
+    shutil.rmtree(Path(hass.config.config_dir, COMPILED_DIR), ignore_errors=True)
+
+    start = time.perf_counter()
+    await get_zones([ZONE_FILE], hass, False, {}, index)
+    parse = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await get_zones([ZONE_FILE], hass, False, {}, index)
+    compiled = time.perf_counter() - start
+    return {"parse_s": parse, "compiled_load_s": compiled}
+
+
+async def _measure_memory(hass: HomeAssistant, index: str) -> tuple[dict, object]:
+    """Measure the memory used by loaded zones, returning the zones as well.
+
+    The python allocations are traced, which include the NumPy arrays. The
+    geometries live in GEOS, so the growth of the resident memory is given as
+    well, where the platform provides it.
+    """
+    gc.collect()
+    rss = _rss_bytes()
+    tracemalloc.start()
+    try:
+        zones = await get_zones([ZONE_FILE], hass, False, {}, index)
+        traced, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    gc.collect()
+
+    after = _rss_bytes()
+    result = {"python_bytes_per_zone": traced / len(zones)}
+    if rss is not None and after is not None:
+        result["rss_bytes_per_zone"] = max(after - rss, 0) / len(zones)
+    return result, zones
+
+
+def _measure_lookups(zones, lats, lons, accs) -> dict:
+    """Measure the single and batch lookups of the fixes."""
+    samples = []
+    matched = 0
+    for lat, lon, acc in zip(lats.tolist(), lons.tolist(), accs.tolist()):
+        start = time.perf_counter()
+        zone = get_locations_zone(lat, lon, acc, zones)
+        samples.append(time.perf_counter() - start)
+        matched += zone is not None
+
+    start = time.perf_counter()
+    get_locations_zones(lats, lons, accs, zones)
+    batch = time.perf_counter() - start
+
+    return {
+        **_percentiles(samples),
+        "lookups_per_s": len(samples) / sum(samples),
+        "batch_lookups_per_s": len(lats) / batch,
+        "matched_fraction": matched / len(samples),
+    }
+
+
+def _measure_geojson(zones) -> dict:
+    """Measure the serialization of the zones."""
+    start = time.perf_counter()
+    geojson = zones_to_geojson(zones)
+    return {
+        "zones_to_geojson_s": time.perf_counter() - start,
+        "geojson_bytes": len(geojson),
+    }
+
+
+def _write_zone_file(
+    path: Path, count: int, vertices: int, layout: str, seed: int
+) -> None:
+    """Generate the zones and write them to a zone file. This is blocking."""
+    collection = generate_zones(count, vertices, layout, seed)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(collection, file)
+
+
+async def run_case(
+    config_dir: Path, count: int, vertices: int, layout: str, lookups: int, seed: int
+) -> list[dict]:
+    """Benchmark a single zone file with every index.
+
+    Args:
+        config_dir: The config directory the zone file is written to.
+        count: The amount of zones.
+        vertices: The amount of vertices of every zone.
+        layout: The layout of the zones, see `synthetic.LAYOUTS`.
+        lookups: The amount of fixes to look up.
+        seed: The seed of the generated zones and fixes.
+
+    Returns:
+        The results of every index.
+
+    """
+    await asyncio.get_running_loop().run_in_executor(
+        None, _write_zone_file, config_dir / ZONE_FILE, count, vertices, layout, seed
+    )
+    lats, lons, accs = generate_fixes(lookups, get_extent(count), seed)
+
+    hass = HomeAssistant(str(config_dir))
+    results = []
+    try:
+        for index in INDEXES:
+            case = {"zones": count, "vertices": vertices, "layout": layout}
+            case["index"] = index
+            case.update(await _measure_load(hass, index))
+            memory, zones = await _measure_memory(hass, index)
+            case.update(memory)
+            case.update(_measure_lookups(zones, lats, lons, accs))
+            if index == INDEXES[0]:
+                case.update(_measure_geojson(zones))
+            del zones
+
+            _LOGGER.info(
+                "%d zones, %d vertices, %s, %s: parse %.3f s, p50 %.1f us",
+                count,
+                vertices,
+                layout,
+                index,
+                case["parse_s"],
+                case["p50_us"],
+            )
+            results.append(case)
+    finally:
+        await hass.async_stop(force=True)
+    return results
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Run all the cases and collect the results."""
+    sizes = QUICK_SIZES if args.quick else args.sizes
+    results = []
+    with tempfile.TemporaryDirectory() as config_dir:
+        for count in sizes:
+            for vertices in args.vertices:
+                for layout in args.layouts:
+                    results.extend(
+                        await run_case(
+                            Path(config_dir),
+                            count,
+                            vertices,
+                            layout,
+                            args.lookups,
+                            args.seed,
+                        )
+                    )
+
+    return {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "numpy": np.__version__,
+            "shapely": shapely.__version__,
+            "geos": shapely.geos_version_string,
+        },
+        "seed": args.seed,
+        "results": results,
+    }
+
+
+def main() -> None:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--vertices", type=int, nargs="+", default=DEFAULT_VERTICES)
+    parser.add_argument("--layouts", nargs="+", choices=LAYOUTS, default=LAYOUTS)
+    parser.add_argument("--lookups", type=int, default=DEFAULT_LOOKUPS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--quick", action="store_true", help=f"only run the sizes {QUICK_SIZES}"
+    )
+    parser.add_argument(
+        "--output", type=Path, default=Path("zones_benchmark.json"), help="results"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    results = asyncio.run(run(args))
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    _LOGGER.info("Wrote %d results to %s", len(results["results"]), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,32 @@
 
 from __future__ import annotations
 
+from datetime import timedelta
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-
-from .const import DOMAIN, PLATFORM
+from homeassistant.core import HomeAssistant, SupportsResponse
+
+from .const import (
+    CONF_COLLECT_METRICS,
+    CONF_PRIORITIZE_ZONE_FILES,
+    CONF_REFRESH_INTERVAL,
+    CONF_ZONE_INDEX,
+    DATA_ZONES,
+    DOMAIN,
+    PLATFORM,
+)
+from .device_tracker import async_get_zone_uris, get_update_options
 from .services import (
+    PROFILE_SCHEMA,
     add_new_zone_action_builder,
     delete_zone_action_builder,
     edit_zone_action_builder,
+    locate_points_action_builder,
+    profile_action_builder,
     replace_all_zones_action_builder,
 )
+from .utils.zone_set import INDEX_STRTREE
 
 PLATFORMS: list[Platform] = [Platform.DEVICE_TRACKER]
 
@@ -20,6 +35,7 @@ PLATFORMS: list[Platform] = [Platform.DEVICE_TRACKER]
 async def async_setup(hass: HomeAssistant, _config: dict) -> bool:
     """Set up the polygonal_zones component."""
     hass.data.setdefault(DOMAIN, {})
+    hass.data.setdefault(DATA_ZONES, {})
 
     hass.services.async_register(
         DOMAIN,
@@ -45,6 +61,21 @@ async def async_setup(hass: HomeAssistant, _config: dict) -> bool:
         replace_all_zones_action_builder(hass),
     )
 
+    hass.services.async_register(
+        DOMAIN,
+        "locate_points",
+        locate_points_action_builder(hass),
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        "profile",
+        profile_action_builder(hass),
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
     return True
 
 
@@ -65,6 +96,11 @@ async def async_unload_entry(hass: HomeAssistant, entry):
     )
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
+        store = hass.data[DATA_ZONES].pop(entry.entry_id, None)
+
+        # write the changes to the zones that are still waiting
+        if store is not None:
+            await store.async_flush()
     return unload_ok
 
 
@@ -74,7 +110,24 @@ async def async_update_options(hass: HomeAssistant, config_entry: ConfigEntry) -
 
 
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload polygonal_zones config entry."""
-    entities = hass.data[DOMAIN][entry.entry_id]
-    for entity in entities:
-        await entity.async_update_config(entry)
+    """Reload polygonal_zones config entry.
+
+    The zones are shared by all entities of the entry, so they are reloaded once
+    and the store passes them on to the entities.
+    """
+    store = hass.data[DATA_ZONES][entry.entry_id]
+    zone_uris, _ = await async_get_zone_uris(hass, entry)
+    store.async_update_config(
+        zone_uris,
+        entry.data.get(CONF_PRIORITIZE_ZONE_FILES),
+        entry.data.get(CONF_ZONE_INDEX, INDEX_STRTREE),
+        timedelta(minutes=entry.data.get(CONF_REFRESH_INTERVAL, 0)),
+        entry.data.get(CONF_COLLECT_METRICS, False),
+    )
+
+    # the entities keep listening, so they get the new options directly
+    update_options = get_update_options(entry.data)
+    for entity in hass.data[DOMAIN].get(entry.entry_id, []):
+        entity.update_options = update_options
+
+    await store.async_reload()
@@ -16,10 +16,76 @@ from homeassistant.helpers import selector
 
 from .const import DOMAIN
 from .utils import validate_data
+from .utils.zone_set import INDEX_STRTREE, INDEXES
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def build_shared_fields(
+    defaults: dict[str, Any] | MappingProxyType[str, Any] | None = None,
+) -> dict:
+    """Create the fields of the index and update options.
+
+    These fields are the same in the config and the options flow.
+    """
+    return {
+        Required(
+            "zone_index",
+            default=defaults.get("zone_index", INDEX_STRTREE),
+        ): selector.SelectSelector(
+            selector.SelectSelectorConfig(
+                options=INDEXES,
+                translation_key="zone_index",
+                mode=selector.SelectSelectorMode.DROPDOWN,
+            )
+        ),
+        Required(
+            "refresh_interval",
+            default=defaults.get("refresh_interval", 0),
+        ): selector.NumberSelector(
+            selector.NumberSelectorConfig(
+                min=0,
+                max=1440,
+                step=1,
+                unit_of_measurement="min",
+                mode=selector.NumberSelectorMode.BOX,
+            )
+        ),
+        Required(
+            "collect_metrics",
+            default=defaults.get("collect_metrics", False),
+        ): selector.BooleanSelector(selector.BooleanSelectorConfig()),
+        Required(
+            "min_update_interval",
+            default=defaults.get("min_update_interval", 0),
+        ): selector.NumberSelector(
+            selector.NumberSelectorConfig(
+                min=0,
+                max=3600,
+                step=1,
+                unit_of_measurement="s",
+                mode=selector.NumberSelectorMode.BOX,
+            )
+        ),
+        Required(
+            "write_on_transition_only",
+            default=defaults.get("write_on_transition_only", False),
+        ): selector.BooleanSelector(selector.BooleanSelectorConfig()),
+        Required(
+            "min_movement",
+            default=defaults.get("min_movement", 0),
+        ): selector.NumberSelector(
+            selector.NumberSelectorConfig(
+                min=0,
+                max=100000,
+                step=1,
+                unit_of_measurement="m",
+                mode=selector.NumberSelectorMode.BOX,
+            )
+        ),
+    }
+
+
 def build_create_flow(
     defaults: dict[str, Any] | MappingProxyType[str, Any] | None = None,
 ) -> Schema:
@@ -38,6 +104,7 @@ def build_create_flow(
                 "prioritize_zone_files",
                 default=defaults.get("prioritize_zone_files", False),
             ): selector.BooleanSelector(selector.BooleanSelectorConfig()),
+            **build_shared_fields(defaults),
             Required(
                 "download_zones",
                 default=defaults.get("download_zones", False),
@@ -73,6 +140,7 @@ def build_options_flow(
                 "prioritize_zone_files",
                 default=defaults.get("prioritize_zone_files", False),
             ): selector.BooleanSelector(selector.BooleanSelectorConfig()),
+            **build_shared_fields(defaults),
         }
     )
 
@@ -88,7 +156,7 @@ class ConfigFlow(EntryConfigFlow, domain=DOMAIN):
         if user_input is not None:
             # validate the input data. If it is valid, create the entry
 
-            errors = await validate_data(user_input, self.hass.config.config_dir)
+            errors = await validate_data(user_input, self.hass)
             if not errors:
                 return self.async_create_entry(title="Polygonal Zones", data=user_input)
 
@@ -121,10 +189,12 @@ class OptionsFlowHandler(OptionsFlow):
         errors = {}
 
         if user_input is not None and errors == {}:
-            errors = await validate_data(user_input, self.hass.config.config_dir)
+            # the options only hold part of the data of the entry
+            data = {**self.config_entry.data, **user_input}
+            errors = await validate_data(data, self.hass)
             if not errors:
                 self.hass.config_entries.async_update_entry(
-                    self.config_entry, data=user_input
+                    self.config_entry, data=data
                 )
                 return self.async_create_entry(title="", data=user_input)
 
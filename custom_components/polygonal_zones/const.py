@@ -3,10 +3,17 @@
 DOMAIN = "polygonal_zones"
 DATA_ZONES = f"{DOMAIN}_zones"
 DATA_ZONES_URL = f"{DOMAIN}_zones_url"
+DATA_DOWNLOAD_LOCKS = f"{DOMAIN}_download_locks"
 
 CONF_PRIORITIZE_ZONE_FILES = "prioritize_zone_files"
 CONF_REGISTERED_ENTITIES = "registered_entities"
 CONF_ZONES_URL = "zone_urls"
 CONF_DOWNLOAD_ZONES = "download_zones"
 CONF_ENSURE_UNIQUE_ENTITIES = "ensure_unique_entities"
+CONF_ZONE_INDEX = "zone_index"
+CONF_REFRESH_INTERVAL = "refresh_interval"
+CONF_COLLECT_METRICS = "collect_metrics"
+CONF_MIN_UPDATE_INTERVAL = "min_update_interval"
+CONF_WRITE_ON_TRANSITION_ONLY = "write_on_transition_only"
+CONF_MIN_MOVEMENT = "min_movement"
 PLATFORM = "device_tracker"
@@ -1,42 +1,125 @@
 """Sensor for the polygonal_zones integration."""
 
 from collections.abc import Callable, Coroutine
+from datetime import timedelta
 import logging
 from pathlib import Path
-from typing import Any
-
-import pandas as pd
+import time
+from typing import Any, NamedTuple
 
 from homeassistant.components.device_tracker import SourceType, TrackerEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
 from homeassistant.helpers import entity_platform
 from homeassistant.helpers.entity import generate_entity_id
+from homeassistant.helpers.event import (
+    async_call_later,
+    async_track_state_change_event,
+)
 
 from .const import (
+    CONF_COLLECT_METRICS,
     CONF_DOWNLOAD_ZONES,
+    CONF_MIN_MOVEMENT,
+    CONF_MIN_UPDATE_INTERVAL,
     CONF_PRIORITIZE_ZONE_FILES,
+    CONF_REFRESH_INTERVAL,
     CONF_REGISTERED_ENTITIES,
+    CONF_WRITE_ON_TRANSITION_ONLY,
+    CONF_ZONE_INDEX,
     CONF_ZONES_URL,
+    DATA_ZONES,
     DOMAIN,
 )
-from .utils import event_should_trigger, get_locations_zone
+from .utils import event_should_trigger
 from .utils.local_zones import download_zones
-from .utils.zones import get_zones
+from .utils.zone_set import INDEX_STRTREE, ZoneChanges, ZoneSet
+from .utils.zone_store import ZoneStore
+from .utils.zones import (
+    get_accuracy_bounds,
+    get_fix_distance,
+    get_locations_zone_and_safe_area,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 
+class UpdateOptions(NamedTuple):
+    """How an entity handles the location updates of its tracked entity.
+
+    Location updates that arrive within `min_interval` seconds of the previous
+    update are coalesced, only the latest of them is handled once the interval
+    has passed. With `transition_only` the state is only written when the zone
+    changed, or the tracker moved more than `min_movement` meters since the
+    last written state if that is set.
+    """
+
+    min_interval: float = 0
+    transition_only: bool = False
+    min_movement: float = 0
+
+
+def get_update_options(data: dict[str, Any]) -> UpdateOptions:
+    """Get the update options from the data of a config entry."""
+    return UpdateOptions(
+        data.get(CONF_MIN_UPDATE_INTERVAL, 0),
+        data.get(CONF_WRITE_ON_TRANSITION_ONLY, False),
+        data.get(CONF_MIN_MOVEMENT, 0),
+    )
+
+
+async def async_get_zone_uris(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> tuple[list[str], bool]:
+    """Get the uris of the zone files of a config entry.
+
+    When the zones of the entry are downloaded, this is the single local file
+    they are downloaded to, which is downloaded first if it does not exist.
+
+    Args:
+        hass: The Home Assistant instance.
+        entry: The config entry.
+
+    Returns:
+        The uris of the zone files and whether the zones are editable.
+
+    """
+    zone_uris = entry.data.get(CONF_ZONES_URL)
+    zone_uris = [
+        zone_uri for zone_uri in zone_uris if zone_uri is not None and zone_uri != ""
+    ]
+
+    # if we need to download the zones downlaod them
+    if not entry.data.get(CONF_DOWNLOAD_ZONES):
+        return zone_uris, False
+
+    download_path = Path(
+        f"{hass.config.config_dir}/polygonal_zones/{entry.entry_id}.json"
+    )
+    if not await hass.async_add_executor_job(download_path.exists):
+        await download_zones(
+            zone_uris,
+            download_path,
+            entry.data.get(CONF_PRIORITIZE_ZONE_FILES),
+            hass,
+        )
+
+    return [f"/polygonal_zones/{entry.entry_id}.json"], True
+
+
 async def custom_async_reload_zones(entity: "PolygonalZoneEntity", call: ServiceCall):
     """Reload the zones of the entity."""
     await entity.async_reload_zones()
 
     if call.return_response:
-        zones_clone = entity.zones.copy()
-        zones_clone["geometry"] = zones_clone["geometry"].apply(
-            lambda polygon: list(polygon.exterior.coords)
-        )
-        return zones_clone[["name", "priority", "geometry"]].to_dict(orient="records")
+        return [
+            {
+                "name": name,
+                "priority": priority,
+                "geometry": list(geometry.exterior.coords),
+            }
+            for name, priority, geometry in entity.zones
+        ]
     return None
 
 
@@ -54,29 +137,19 @@ async def async_setup_entry(
         None
 
     """
-    zone_uris = entry.data.get(CONF_ZONES_URL)
-    zone_uris = [
-        zone_uri for zone_uri in zone_uris if zone_uri is not None and zone_uri != ""
-    ]
-
-    editable_file = False
-
-    # if we need to download the zones downlaod them
-    if entry.data.get(CONF_DOWNLOAD_ZONES):
-        download_path = Path(
-            f"{hass.config.config_dir}/polygonal_zones/{entry.entry_id}.json"
-        )
-
-        if not download_path.exists():
-            await download_zones(
-                zone_uris,
-                download_path,
-                entry.data.get(CONF_PRIORITIZE_ZONE_FILES),
-                hass,
-            )
-
-        zone_uris = [f"/polygonal_zones/{entry.entry_id}.json"]
-        editable_file = True
+    zone_uris, editable_file = await async_get_zone_uris(hass, entry)
+
+    # the zones are loaded once and shared by all the entities of the entry
+    store = ZoneStore(
+        hass,
+        zone_uris,
+        entry.data.get(CONF_PRIORITIZE_ZONE_FILES),
+        entry.data.get(CONF_ZONE_INDEX, INDEX_STRTREE),
+        editable_file,
+        timedelta(minutes=entry.data.get(CONF_REFRESH_INTERVAL, 0)),
+        entry.data.get(CONF_COLLECT_METRICS, False),
+    )
+    hass.data[DATA_ZONES][entry.entry_id] = store
 
     # create the entities
     entities = []
@@ -90,10 +163,10 @@ async def async_setup_entry(
         entity = PolygonalZoneEntity(
             entity_id,
             entry.entry_id,
-            zone_uris,
+            store,
             base_id,
-            entry.data.get(CONF_PRIORITIZE_ZONE_FILES),
             editable_file,
+            get_update_options(entry.data),
         )
         entities.append(entity)
 
@@ -112,8 +185,22 @@ async def async_setup_entry(
 class PolygonalZoneEntity(TrackerEntity):
     """Representation of a polygonal zone entity."""
 
-    _zones: pd.DataFrame = pd.DataFrame([])
+    _zones: ZoneSet = None
     _unsub: callable = None
+    _unsub_zones: callable = None
+
+    # (latitude, longitude, gps accuracy) of the last location update
+    _last_fix: tuple[float, float, float] | None = None
+    # (latitude, longitude, radius, location name) of the last full search
+    _safe_area: tuple[float, float, float, str] | None = None
+    _fast_path_hits: int = 0
+    _fast_path_misses: int = 0
+
+    # the time.monotonic() of the last handled location update
+    _last_update: float | None = None
+    _unsub_delayed_update: callable = None
+    # (latitude, longitude, location name) of the last written state
+    _written: tuple[float, float, str] | None = None
 
     _attr_location_name: str = None
     _attr_latitude: float = None
@@ -124,21 +211,21 @@ class PolygonalZoneEntity(TrackerEntity):
         self,
         tracked_entity_id,
         config_entry_id,
-        zone_urls,
+        store: ZoneStore,
         unique_id,
-        prioritized_zone_files,
         editable_file,
+        update_options: UpdateOptions | None = None,
     ):
         """Initialize the entity."""
         self._config_entry_id = config_entry_id
         self._entity_id = tracked_entity_id
-        self._zones_urls = zone_urls
-        self._prioritize_zone_files = prioritized_zone_files
+        self._store = store
 
         self.entity_id = unique_id
         self._attr_unique_id = unique_id
         self._attr_source_type = SourceType.GPS
         self._editable_file = editable_file
+        self.update_options = update_options or UpdateOptions()
 
     async def async_added_to_hass(self):
         """Run when the entity is added to homeassistant.
@@ -146,22 +233,13 @@ class PolygonalZoneEntity(TrackerEntity):
         This function registers the listener and sets the initial known state.
         If the entities state is None, it will stay in the unknown state.
         """
-        self._zones = await get_zones(
-            self._zones_urls, self.hass, self._prioritize_zone_files
-        )
-        self._unsub = self.hass.bus.async_listen(
-            "state_changed", self._handle_state_change_builder()
-        )
-
-        await self._update_state()
-
-    async def async_update_config(self, config_entry: ConfigEntry):
-        """Update the configuration of the entity."""
-        self._zones_urls = config_entry.data.get(CONF_ZONES_URL)
-        self._prioritize_zone_files = config_entry.data.get(CONF_PRIORITIZE_ZONE_FILES)
-
-        self._zones = await get_zones(
-            self._zones_urls, self.hass, self._prioritize_zone_files
+        self._store.async_acquire()
+        self._zones = await self._store.async_get_zones()
+        self._unsub_zones = self._store.async_add_listener(self._async_zones_updated)
+        # only listen to the tracked entity. The state changes of all other
+        # entities are filtered out by homeassistant before reaching us.
+        self._unsub = async_track_state_change_event(
+            self.hass, [self._entity_id], self._handle_state_change_builder()
         )
 
         await self._update_state()
@@ -170,6 +248,12 @@ class PolygonalZoneEntity(TrackerEntity):
         """Handle cleanup when the entity is removed."""
         if self._unsub:
             self._unsub()
+        if self._unsub_zones:
+            self._unsub_zones()
+        if self._unsub_delayed_update:
+            self._unsub_delayed_update()
+            self._unsub_delayed_update = None
+        self._store.async_release()
 
     def update_location(self, latitude, longitude, gps_accuracy) -> None:
         """Update the location of the entity.
@@ -182,19 +266,62 @@ class PolygonalZoneEntity(TrackerEntity):
             gps_accuracy: The accuracy of the entity.
 
         """
+        self._last_fix = (latitude, longitude, gps_accuracy)
+        metrics = self._store.metrics
+        if self._in_safe_area(latitude, longitude, gps_accuracy):
+            self._fast_path_hits += 1
+            if metrics is not None:
+                metrics.increment("fast_path_hits")
+        else:
+            self._fast_path_misses += 1
+            if metrics is not None:
+                metrics.increment("fast_path_misses")
+
+            # the search also tells the area around this fix in which the zone
+            # stays the same
+            zone, radius, zone_idx = get_locations_zone_and_safe_area(
+                latitude, longitude, gps_accuracy, self._zones, metrics
+            )
+            _LOGGER.info(
+                "State of entity '%s' changed. new zone: %s", self._attr_unique_id, zone
+            )
+            self._attr_location_name = zone["name"] if zone is not None else "away"
+
+            name = "away" if zone_idx is None else self._zones.names[zone_idx]
+            self._safe_area = (latitude, longitude, radius, name)
 
-        zone = get_locations_zone(latitude, longitude, gps_accuracy, self._zones)
-        _LOGGER.info(
-            "State of entity '%s' changed. new zone: %s", self._attr_unique_id, zone
-        )
-        self._attr_location_name = zone["name"] if zone is not None else "away"
         self._attr_extra_state_attributes = {
             "source_entity": self._entity_id,
             "latitude": latitude,
             "longitude": longitude,
             "gps_accuracy": gps_accuracy,
-            "zone_uris": self._zones_urls,
+            "zone_uris": self._store.uris,
         }
+        # the counts change on every update, so they are only added on request
+        if metrics is not None:
+            self._attr_extra_state_attributes.update(
+                {
+                    "fast_path_hits": self._fast_path_hits,
+                    "fast_path_misses": self._fast_path_misses,
+                }
+            )
+
+    def _in_safe_area(self, latitude, longitude, gps_accuracy) -> bool:
+        """Check if the fix is within the safe area of the last full search.
+
+        If it is, the location name is set to the zone of the safe area, which
+        is the zone a full search would return.
+        """
+        if self._safe_area is None:
+            return False
+
+        safe_lat, safe_lon, radius, name = self._safe_area
+        movement = get_fix_distance(safe_lat, safe_lon, latitude, longitude)
+        if movement + gps_accuracy >= radius:
+            return False
+
+        self._attr_location_name = name
+        return True
 
     def _handle_state_change_builder(
         self,
@@ -207,37 +334,127 @@ class PolygonalZoneEntity(TrackerEntity):
         async def func(event: Any) -> None:
             # check if it is the entity we should listen to.
             if event_should_trigger(event, self._entity_id):
-                await self._update_state()
+                await self._async_location_changed()
 
         return func
 
+    async def _async_location_changed(self) -> None:
+        """Handle a location update, coalescing the updates of a burst.
+
+        Within the minimum update interval of the previous update the handling
+        is postponed to the end of the interval, where the state of the tracked
+        entity holds the latest location of all updates in between.
+        """
+        min_interval = self.update_options.min_interval
+        if min_interval > 0 and self._last_update is not None:
+            delay = self._last_update + min_interval - time.monotonic()
+            if delay > 0:
+                if self._unsub_delayed_update is None:
+                    self._unsub_delayed_update = async_call_later(
+                        self.hass, delay, self._async_delayed_update
+                    )
+                if self._store.metrics is not None:
+                    self._store.metrics.increment("updates_coalesced")
+                return
+
+        await self._update_state()
+
+    async def _async_delayed_update(self, _now=None) -> None:
+        """Handle the latest location update after the minimum update interval."""
+        self._unsub_delayed_update = None
+        await self._update_state()
+
+    def _should_write_state(self) -> bool:
+        """Decide if the state after a location update is written.
+
+        Without the transition only option every update is written. Otherwise
+        only a change of zone, or a movement of more than the minimum movement
+        since the last written state if that is set.
+        """
+        latitude, longitude, _ = self._last_fix
+        options = self.update_options
+        if options.transition_only and self._written is not None:
+            written_lat, written_lon, written_name = self._written
+            if written_name == self._attr_location_name and (
+                options.min_movement <= 0
+                or get_fix_distance(written_lat, written_lon, latitude, longitude)
+                < options.min_movement
+            ):
+                return False
+
+        self._written = (latitude, longitude, self._attr_location_name)
+        return True
+
     async def _update_state(self):
         entity_state = self.hass.states.get(self._entity_id)
         if entity_state is not None and all(
             key in entity_state.attributes
             for key in ["latitude", "longitude", "gps_accuracy"]
         ):
+            metrics = self._store.metrics
+            if metrics is not None:
+                start = time.perf_counter()
+
+            self._last_update = time.monotonic()
             self.update_location(
                 entity_state.attributes["latitude"],
                 entity_state.attributes["longitude"],
                 entity_state.attributes["gps_accuracy"],
             )
 
-            self.async_write_ha_state()
+            if metrics is not None:
+                duration = time.perf_counter() - start
+                metrics.increment("entity_updates")
+                metrics.observe("entity_update", duration)
+                self._attr_extra_state_attributes["update_duration_ms"] = (
+                    duration * 1000
+                )
+
+            if self._should_write_state():
+                self.async_write_ha_state()
+            elif metrics is not None:
+                metrics.increment("writes_skipped")
 
     async def async_reload_zones(self):
-        """Reload the zones."""
-        self._zones = await get_zones(
-            self._zones_urls, self.hass, self._prioritize_zone_files
-        )
+        """Reload the zones.
+
+        The zones are shared with the other entities of the config entry, so
+        those are updated as well.
+        """
+        await self._store.async_reload()
+
+    async def _async_zones_updated(self, zones: ZoneSet, changes: ZoneChanges | None):
+        """Update the state using the zones loaded by the store.
+
+        When none of the changed zones are near the last location of the
+        tracker its zone can not have changed, so it is not searched again.
+        """
+        self._zones = zones
+        if (
+            changes is not None
+            and self._last_fix is not None
+            and not changes.affects(get_accuracy_bounds(*self._last_fix))
+        ):
+            if self._safe_area is not None:
+                safe_lat, safe_lon, radius, _ = self._safe_area
+                if changes.affects(get_accuracy_bounds(safe_lat, safe_lon, radius)):
+                    self._safe_area = None
+            return
+
+        self._safe_area = None
         _LOGGER.info("Reloaded zones of entity: %s", self._attr_unique_id)
         await self._update_state()
 
     @property
-    def zones(self) -> pd.DataFrame:
+    def zones(self) -> ZoneSet:
         """The loaded zones."""
         return self._zones
 
+    @property
+    def last_fix(self) -> tuple[float, float, float] | None:
+        """The (latitude, longitude, gps accuracy) of the last location update."""
+        return self._last_fix
+
     @property
     def editable_file(self) -> bool:
         """Is the zone file editable."""
@@ -246,7 +463,7 @@ class PolygonalZoneEntity(TrackerEntity):
     @property
     def zone_urls(self) -> list[str]:
         """List of the urls where the zones are stored."""
-        return self._zones_urls
+        return self._store.uris
 
     @property
     def source_type(self) -> SourceType | str:
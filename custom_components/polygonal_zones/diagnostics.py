@@ -0,0 +1,42 @@
+"""Diagnostics support for the polygonal zones integration."""
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_ZONES_URL, DATA_ZONES
+from .utils.zone_store import ZoneStore
+
+# The urls of the zone files might contain credentials.
+TO_REDACT = {CONF_ZONES_URL}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the diagnostics of a config entry.
+
+    These contain the configuration, the size of the loaded zones and the
+    metrics of the zones when they are collected.
+    """
+    store: ZoneStore | None = hass.data.get(DATA_ZONES, {}).get(entry.entry_id)
+    zones = store.zones if store is not None else None
+
+    diagnostics: dict[str, Any] = {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "zones": None,
+        "metrics": None,
+    }
+    if zones is not None:
+        diagnostics["zones"] = {
+            "count": len(zones),
+            "index": store.index,
+            "edges": len(zones.edge_starts),
+            "shelled_zones": int(zones.shelled.sum()),
+            "grid_cells": len(zones.grid) if zones.grid is not None else None,
+        }
+    if store is not None and store.metrics is not None:
+        diagnostics["metrics"] = store.metrics.as_dict()
+    return diagnostics
@@ -3,11 +3,16 @@
 from .add_new_zone import add_new_zone_action_builder
 from .delete_zone import delete_zone_action_builder
 from .edit_zone import edit_zone_action_builder
+from .locate_points import locate_points_action_builder
+from .profile import PROFILE_SCHEMA, profile_action_builder
 from .replace_all_zones import replace_all_zones_action_builder
 
 __all__ = [
+    "PROFILE_SCHEMA",
     "add_new_zone_action_builder",
     "delete_zone_action_builder",
     "edit_zone_action_builder",
+    "locate_points_action_builder",
+    "profile_action_builder",
     "replace_all_zones_action_builder",
 ]
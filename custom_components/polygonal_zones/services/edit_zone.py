@@ -1,17 +1,16 @@
 """definition file for the edit zone action."""
 
 import json
-from pathlib import Path
 
 from homeassistant.core import HomeAssistant, ServiceCall
 
 from .errors import (
+    InvalidZone,
+    ZoneAlreadyExists,
     ZoneDoesNotExists,
     ZoneFileNotEditable,
 )
-from ..utils.general import load_data
-from ..utils.local_zones import save_zones
-from .helpers import get_entities_from_device_id, get_zone_idx
+from .helpers import get_store_from_device_id
 
 
 def edit_zone_action_builder(hass: HomeAssistant):
@@ -20,31 +19,30 @@ def edit_zone_action_builder(hass: HomeAssistant):
     async def add_new_zone(call: ServiceCall):
         """Handle the service action call."""
         device_id = call.data.get("device_id")[0]
-        entity = get_entities_from_device_id(device_id, hass)[0]
+        store = get_store_from_device_id(device_id, hass)
 
-        if not entity.editable_file:
+        if not store.editable:
             raise ZoneFileNotEditable("Zone files of entity are not editable")
 
-        # get the source path for the zones
-        filename = entity.zone_urls[0]
-        filepath = Path(f"{hass.config.config_dir}/{filename}")
-        existing_zones = json.loads(await load_data(str(filename), hass))
+        repository = await store.async_get_repository()
 
         # get the name and data to edit
         old_name = call.data.get("zone_name")
         new_zone = json.loads(call.data.get("zone"))
 
-        idx = get_zone_idx(old_name, existing_zones)
-        if idx is None:
+        if old_name not in repository:
             raise ZoneDoesNotExists(f'The zone with name "{old_name}" does not exists')
 
-        # replace the zone and save it
-        del existing_zones["features"][idx]
-        existing_zones["features"].append(new_zone)
-
-        new_content = json.dumps(
-            {"type": "FeatureCollection", "features": existing_zones["features"]}
-        )
-        await save_zones(new_content, filepath, hass)
+        # replace the zone, this fails if it is renamed to an existing zone
+        try:
+            repository.edit(old_name, new_zone)
+        except KeyError as err:
+            raise ZoneAlreadyExists(
+                f'The zone with name "{err.args[0]}" already exists'
+            ) from err
+        except (TypeError, ValueError) as err:
+            raise InvalidZone(str(err)) from err
+
+        await store.async_save_repository()
 
     return add_new_zone
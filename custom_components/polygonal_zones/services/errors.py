@@ -13,3 +13,11 @@ class ZoneAlreadyExists(HomeAssistantError):
 
 class ZoneDoesNotExists(HomeAssistantError):
     """Error to signal that the zone already exists in that file."""
+
+
+class InvalidZone(HomeAssistantError):
+    """Error to signal that the provided zone is not a valid GeoJSON feature."""
+
+
+class InvalidPoints(HomeAssistantError):
+    """Error to signal that the provided points can not be located."""
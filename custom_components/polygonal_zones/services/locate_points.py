@@ -0,0 +1,41 @@
+"""definition file for the locate points action."""
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse
+
+from ..utils.zones import get_locations_zones
+from .errors import InvalidPoints
+from .helpers import get_entities_from_device_id
+
+
+def locate_points_action_builder(hass: HomeAssistant):
+    """Builder for the locate points action."""
+
+    async def locate_points(call: ServiceCall) -> ServiceResponse:
+        """Handle the service action call.
+
+        The points are located in the executor, as a large list of points
+        would block homeassistant for too long.
+        """
+        device_id = call.data.get("device_id")[0]
+        entity = get_entities_from_device_id(device_id, hass)[0]
+
+        # get the coordinates of all the points
+        points = call.data.get("points")
+        try:
+            lats = [float(point["latitude"]) for point in points]
+            lons = [float(point["longitude"]) for point in points]
+            accs = [float(point.get("gps_accuracy", 0)) for point in points]
+        except (KeyError, TypeError, ValueError) as err:
+            raise InvalidPoints(
+                "Every point needs a latitude, longitude and optional gps_accuracy"
+            ) from err
+
+        if entity.zones is None:
+            raise InvalidPoints("The zones have not been loaded yet")
+
+        zones = await hass.async_add_executor_job(
+            get_locations_zones, lats, lons, accs, entity.zones
+        )
+        return {"zones": zones}
+
+    return locate_points
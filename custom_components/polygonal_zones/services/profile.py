@@ -0,0 +1,70 @@
+"""definition file for the profile action."""
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse
+from homeassistant.helpers import config_validation as cv
+
+from ..utils.profiling import get_jittered_fixes, profile_lookups
+from ..utils.zone_set import ZoneSet
+from .errors import InvalidPoints
+from .helpers import get_entities_from_device_id
+
+DEFAULT_SAMPLES = 1000
+DEFAULT_JITTER = 100
+DEFAULT_TOP = 20
+
+PROFILE_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Optional("samples", default=DEFAULT_SAMPLES): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=100000)
+        ),
+        vol.Optional("jitter", default=DEFAULT_JITTER): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=100000)
+        ),
+        vol.Optional("top", default=DEFAULT_TOP): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=200)
+        ),
+    }
+)
+
+
+def _profile(
+    zones: ZoneSet,
+    fixes: list[tuple[float, float, float]],
+    samples: int,
+    jitter: float,
+    top: int,
+) -> dict:
+    """Profile the lookups of samples around the fixes. This is blocking."""
+    samples = get_jittered_fixes(fixes, samples, jitter, seed=0)
+    return profile_lookups(zones, samples, top)
+
+
+def profile_action_builder(hass: HomeAssistant):
+    """Builder for the profile action."""
+
+    async def profile(call: ServiceCall) -> ServiceResponse:
+        """Handle the service action call.
+
+        The samples are generated and looked up in the executor, so the
+        profile does not block homeassistant while it runs.
+        """
+        device_id = call.data.get("device_id")[0]
+        entities = get_entities_from_device_id(device_id, hass)
+
+        # the current positions of the trackers of the device
+        fixes = [entity.last_fix for entity in entities if entity.last_fix]
+        if not fixes:
+            raise InvalidPoints("None of the trackers of the device has a location")
+
+        return await hass.async_add_executor_job(
+            _profile,
+            entities[0].zones,
+            fixes,
+            call.data["samples"],
+            call.data["jitter"],
+            call.data["top"],
+        )
+
+    return profile
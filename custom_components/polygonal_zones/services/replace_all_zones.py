@@ -1,13 +1,11 @@
 """definition file for the add new zone action."""
 
 import json
-from pathlib import Path
 
 from homeassistant.core import HomeAssistant, ServiceCall
 
-from .errors import ZoneFileNotEditable
-from ..utils.local_zones import save_zones
-from .helpers import get_entities_from_device_id
+from .errors import InvalidZone, ZoneFileNotEditable
+from .helpers import get_store_from_device_id
 
 
 def replace_all_zones_action_builder(hass: HomeAssistant):
@@ -16,18 +14,20 @@ def replace_all_zones_action_builder(hass: HomeAssistant):
     async def replace_all_zones(call: ServiceCall):
         """Handle the service action call."""
         device_id = call.data.get("device_id")[0]
-        entity = get_entities_from_device_id(device_id, hass)[0]
+        store = get_store_from_device_id(device_id, hass)
 
-        if not entity.editable_file:
+        if not store.editable:
             raise ZoneFileNotEditable("Zone files of entity are not editable")
 
-        # get the source path for the zones
-        filename = entity.zone_urls[0]
-        filepath = Path(f"{hass.config.config_dir}/{filename}")
+        repository = await store.async_get_repository()
 
-        # get the name and data of the new zone
-        new_zone = json.loads(call.data.get("zone"))
-        new_content = json.dumps(new_zone)
-        await save_zones(new_content, filepath, hass)
+        # replace the zones with the features of the new collection
+        new_zones = json.loads(call.data.get("zone"))
+        try:
+            repository.replace(new_zones["features"])
+        except (KeyError, TypeError, ValueError) as err:
+            raise InvalidZone(str(err)) from err
+
+        await store.async_save_repository()
 
     return replace_all_zones
@@ -2,12 +2,13 @@
 
 from .config_validation import validate_data, validate_url
 from .general import event_should_trigger, load_data
-from .zones import get_locations_zone, get_zones
+from .zones import get_locations_zone, get_locations_zones, get_zones
 
 __all__ = [
     "load_data",
     "event_should_trigger",
     "get_locations_zone",
+    "get_locations_zones",
     "get_zones",
     "validate_url",
     "validate_data",
@@ -0,0 +1,158 @@
+"""Compiled binary copies of zone files for the polygonal zones integration.
+
+Parsing a large GeoJSON file takes seconds, so the parsed zones of every
+source are also stored in a binary form that loads in milliseconds. The
+compiled copy of a content of a source is a directory, named after the hash
+of that content, with:
+
+- `priorities.npy`: the priorities of the zones, NaN when not defined.
+- `wkb.npy`: the WKB of all the geometries after each other.
+- `offsets.npy`: the start of the WKB of every zone, and the end of the last.
+- `source.json`: the hash of the GeoJSON it was compiled from and the names of
+  the zones, written last. The names are kept as JSON, so they keep their type.
+
+The arrays are memory mapped when they are loaded.
+"""
+
+import hashlib
+from itertools import pairwise
+import json
+import logging
+import math
+import os
+from pathlib import Path
+import shutil
+
+import numpy as np
+import shapely
+from shapely.geometry.base import BaseGeometry
+
+from homeassistant.core import HomeAssistant
+
+from .general import write_file_atomic
+
+_LOGGER = logging.getLogger(__name__)
+
+# The directory in the config directory where the compiled zones are stored.
+COMPILED_DIR = "polygonal_zones/compiled"
+# The version of the layout, compiled zones of other versions are not used.
+COMPILED_VERSION = 2
+
+_METADATA = "source.json"
+_ARRAYS = ("priorities", "wkb", "offsets")
+
+
+def get_compiled_path(uri: str, hass: HomeAssistant) -> Path:
+    """Get the directory of the compiled zones of a source.
+
+    The directory holds the compiled zones of the latest content of the
+    source. The older contents are removed once a new one is written, so they
+    do not pile up.
+    """
+    name = hashlib.sha1(uri.encode()).hexdigest()
+    return Path(hass.config.config_dir, COMPILED_DIR, name)
+
+
+def read_compiled(
+    path: Path, digest: str
+) -> tuple[list[str], list[float | None], list[BaseGeometry]] | None:
+    """Read the compiled zones of a source. This is blocking.
+
+    Args:
+        path: The directory of the compiled zones of the source.
+        digest: The sha256 hash of the current content of the source.
+
+    Returns:
+        The names, priorities and geometries of the zones, or None if there are
+        no compiled zones for this content of the source.
+
+    """
+    path = path / digest
+    try:
+        with open(path / _METADATA, encoding="utf-8") as file:
+            metadata = json.load(file)
+        if metadata.get("version") != COMPILED_VERSION or (
+            metadata.get("digest") != digest
+        ):
+            return None
+
+        names = metadata["names"]
+        priorities, wkb, offsets = (
+            np.load(path / f"{name}.npy", mmap_mode="r") for name in _ARRAYS
+        )
+    except (AttributeError, KeyError, OSError, ValueError) as err:
+        _LOGGER.debug("Compiled zones in %s can not be read: %s", path, err)
+        return None
+    if not isinstance(names, list) or len(names) != len(offsets) - 1:
+        _LOGGER.debug("Compiled zones in %s do not match their names", path)
+        return None
+
+    # slicing a memoryview of the mapped array does not copy, so only the WKB
+    # of each zone is copied for the decoder and not the complete array.
+    buffer = memoryview(wkb)
+    blobs = [bytes(buffer[start:end]) for start, end in pairwise(offsets.tolist())]
+    geometries = shapely.from_wkb(blobs) if blobs else []
+    return (
+        names,
+        [None if math.isnan(p) else p for p in priorities.tolist()],
+        list(geometries),
+    )
+
+
+def write_compiled(
+    path: Path,
+    digest: str,
+    names: list[str],
+    priorities: list[float | None],
+    geometries: list[BaseGeometry],
+) -> None:
+    """Write the compiled zones of a source. This is blocking.
+
+    The metadata is removed first and written last, so the compiled zones are
+    never used while they are partially written. Once they are written, the
+    compiled zones of the other contents of the source are removed.
+
+    Args:
+        path: The directory of the compiled zones of the source.
+        digest: The sha256 hash of the content the zones were parsed from.
+        names: The names of the zones, which must be JSON serializable.
+        priorities: The priorities of the zones, None if not defined.
+        geometries: The geometries of the zones.
+
+    """
+    source_path = path
+    path = path / digest
+    path.mkdir(parents=True, exist_ok=True)
+    metadata_path = path / _METADATA
+    metadata_path.unlink(missing_ok=True)
+
+    blobs = shapely.to_wkb(np.asarray(geometries, dtype=object))
+    offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+    np.cumsum([len(blob) for blob in blobs], out=offsets[1:])
+
+    arrays = {
+        "priorities": np.array(
+            [np.nan if p is None else p for p in priorities], dtype=float
+        ),
+        "wkb": np.frombuffer(b"".join(blobs), dtype=np.uint8),
+        "offsets": offsets,
+    }
+    for name, array in arrays.items():
+        part_path = path / f"{name}.part"
+        with open(part_path, "wb") as file:
+            np.save(file, array)
+        os.replace(part_path, path / f"{name}.npy")
+
+    write_file_atomic(
+        metadata_path,
+        json.dumps({"version": COMPILED_VERSION, "digest": digest, "names": names}),
+    )
+
+    # the other contents, and the files of older versions of the layout
+    for other in source_path.iterdir():
+        if other.name == digest:
+            continue
+        if other.is_dir():
+            shutil.rmtree(other, ignore_errors=True)
+        else:
+            other.unlink(missing_ok=True)
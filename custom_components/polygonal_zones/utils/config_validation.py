@@ -5,21 +5,26 @@ from urllib.parse import urlparse
 
 import aiohttp
 
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
 from ..const import CONF_DOWNLOAD_ZONES, CONF_ZONES_URL
 
 
-async def validate_url(url: str) -> bool:
+async def validate_url(url: str, hass: HomeAssistant) -> bool:
     """Validate if the url is valid and reachable.
 
     Args:
         url: The url to check.
+        hass: The homeassistant instance.
 
     Returns:
         A boolean if the url is reachable and responds with the correct http code.
 
     """
     try:
-        async with aiohttp.ClientSession() as session, session.get(url) as response:
+        session = async_get_clientsession(hass)
+        async with session.get(url) as response:
             if response.status != 200:
                 return False
     except aiohttp.ClientError:
@@ -28,20 +33,21 @@ async def validate_url(url: str) -> bool:
     return True
 
 
-async def validate_data(user_input, config_dir) -> dict:
+async def validate_data(user_input, hass: HomeAssistant) -> dict:
     """Validate the data entered by the user.
 
     Args:
         user_input: The data entered by the user.
-        config_dir: The directory of the homeassistant config.
+        hass: The homeassistant instance.
 
     Returns:
         A dictionary containing the errors.
 
     """
     errors = {}
+    config_dir = hass.config.config_dir
 
-    if len(user_input[CONF_ZONES_URL]) == 0 and not user_input[CONF_DOWNLOAD_ZONES]:
+    if len(user_input[CONF_ZONES_URL]) == 0 and not user_input.get(CONF_DOWNLOAD_ZONES):
         errors["zone_urls"] = "download_or_no_zones"
 
     # check if the URL is valid
@@ -50,7 +56,7 @@ async def validate_data(user_input, config_dir) -> dict:
             parsed = urlparse(uri)
             if not parsed.scheme or not parsed.netloc:
                 errors["zone_urls"] = "invalid_url"
-            elif not await validate_url(uri):
+            elif not await validate_url(uri, hass):
                 errors["zone_urls"] = "unreachable_url"
         elif not os.path.exists(f"{config_dir}/{uri}"):
             errors["zone_urls"] = "invalid_path"
@@ -0,0 +1,7 @@
+"""Custom errors for the utilities of the polygonal zones integration."""
+
+from homeassistant.exceptions import HomeAssistantError
+
+
+class ZoneLoadError(HomeAssistantError):
+    """Error to signal that none of the zone sources could be loaded."""
@@ -1,8 +1,183 @@
 """General helper functions for the polygonal_zones integration."""
 
-import aiohttp
+import asyncio
+from functools import partial
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from aiohttp import hdrs
 
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from ..const import DATA_DOWNLOAD_LOCKS
+from .metrics import Metrics
+
+# The directory in the config directory where the remote zone files are cached.
+CACHE_DIR = "polygonal_zones/cache"
+# The size of the chunks in which remote files are downloaded.
+CHUNK_SIZE = 64 * 1024
+
+
+def _get_cache_path(uri: str, hass: HomeAssistant) -> Path:
+    """Get the path of the cached body of a remote file.
+
+    The metadata of the response is stored next to it with a .meta suffix.
+    """
+    name = hashlib.sha1(uri.encode()).hexdigest()
+    return Path(hass.config.config_dir, CACHE_DIR, f"{name}.json")
+
+
+def _get_download_lock(cache_path: Path, hass: HomeAssistant) -> asyncio.Lock:
+    """Get the lock that serializes the downloads into a cache file."""
+    locks = hass.data.setdefault(DATA_DOWNLOAD_LOCKS, {})
+    if cache_path not in locks:
+        locks[cache_path] = asyncio.Lock()
+    return locks[cache_path]
+
+
+def _read_cache_metadata(path: Path) -> dict | None:
+    """Read the metadata of a cached response, None if the response is not cached."""
+    try:
+        if path.exists():
+            with open(path.with_suffix(".meta"), encoding="utf-8") as file:
+                return json.load(file)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _read_file(path: Path | str) -> str:
+    """Read the content of a file. This is blocking, so run it in the executor."""
+    with open(path, encoding="utf-8") as file:
+        return file.read()
+
+
+def _write_cache_metadata(path: Path, metadata: dict) -> None:
+    """Store the metadata of a response in the cache."""
+    with open(path.with_suffix(".meta"), "w", encoding="utf-8") as file:
+        json.dump(metadata, file)
+
+
+def write_file_atomic(destination: Path, content: str) -> None:
+    """Replace the content of a file, without ever leaving a partial file.
+
+    The content is written to a temporary file next to the destination, which
+    then replaces the destination in a single rename. This is blocking, so run
+    it in the executor.
+
+    Args:
+        destination: Path of the file to write.
+        content: The new content of the file.
+
+    """
+    part_path = destination.with_suffix(".part")
+    with open(part_path, "w", encoding="utf-8") as file:
+        file.write(content)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(part_path, destination)
+
+
+async def _download_data(
+    uri: str, hass: HomeAssistant, metrics: Metrics | None = None
+) -> Path:
+    """Download a remote file into the cache using a conditional request.
+
+    The body is streamed to the cache file in chunks, so it never has to be
+    held in memory completely. The ETag and Last-Modified headers of the
+    response are stored next to it. The next request for the file sends these
+    back, so an unchanged file results in a 304 response and the cached file
+    is used.
+
+    Downloads of the same uri, like a refresh overlapping a reload, share the
+    cache file, so they run one after the other. The later download then
+    usually gets a 304 response for the file the first one stored.
+
+    Args:
+        uri: The link to the file to download.
+        hass: The homeassistant instance.
+        metrics: The metrics to count the requests and bytes in, if collected.
+
+    Returns:
+        The path of the cached file.
+
+    """
+    cache_path = _get_cache_path(uri, hass)
+    async with _get_download_lock(cache_path, hass):
+        await _download_to_cache(uri, hass, cache_path, metrics)
+    return cache_path
+
+
+async def _download_to_cache(
+    uri: str, hass: HomeAssistant, cache_path: Path, metrics: Metrics | None
+) -> None:
+    """Download a remote file into its cache file, see `_download_data`."""
+    metadata = await hass.async_add_executor_job(_read_cache_metadata, cache_path)
+
+    headers = {}
+    if metadata is not None:
+        if metadata.get("etag"):
+            headers[hdrs.IF_NONE_MATCH] = metadata["etag"]
+        if metadata.get("last_modified"):
+            headers[hdrs.IF_MODIFIED_SINCE] = metadata["last_modified"]
+
+    session = async_get_clientsession(hass)
+    async with session.get(uri, headers=headers) as response:
+        if metrics is not None:
+            metrics.increment("http_requests")
+        if response.status == 304 and metadata is not None:
+            if metrics is not None:
+                metrics.increment("http_not_modified")
+            return
+
+        response.raise_for_status()
+        metadata = {
+            "uri": uri,
+            "etag": response.headers.get(hdrs.ETAG),
+            "last_modified": response.headers.get(hdrs.LAST_MODIFIED),
+        }
+
+        # write to a temporary file so a failed download keeps the cached file
+        part_path = cache_path.with_suffix(".part")
+        await hass.async_add_executor_job(
+            partial(part_path.parent.mkdir, parents=True, exist_ok=True)
+        )
+        file = await hass.async_add_executor_job(open, part_path, "wb")
+        try:
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                await hass.async_add_executor_job(file.write, chunk)
+                if metrics is not None:
+                    metrics.increment("bytes_fetched", len(chunk))
+        finally:
+            await hass.async_add_executor_job(file.close)
+
+    await hass.async_add_executor_job(os.replace, part_path, cache_path)
+    await hass.async_add_executor_job(_write_cache_metadata, cache_path, metadata)
+
+
+async def get_data_path(
+    uri: str, hass: HomeAssistant, metrics: Metrics | None = None
+) -> Path:
+    """Get the path of a local file containing the data of a file or website.
+
+    Websites are downloaded into the cache using the shared client session of
+    homeassistant, see `_download_data`.
+
+    Args:
+        uri: The link/path to the file.
+        hass: The homeassistant instance.
+        metrics: The metrics of the downloads, if collected.
+
+    Returns:
+        The path of the file or an error if it cant be reached.
+
+    """
+    if uri.startswith(("http", "https")):
+        return await _download_data(uri, hass, metrics)
+    return Path(f"{hass.config.config_dir}/{uri}")
 
 
 async def load_data(uri: str, hass: HomeAssistant) -> str:
@@ -16,15 +191,8 @@ async def load_data(uri: str, hass: HomeAssistant) -> str:
         the content of the file or an error if it cant be found/reached.
 
     """
-    if uri.startswith(("http", "https")):
-        async with aiohttp.ClientSession() as session, session.get(uri) as response:
-            return await response.text()
-    else:
-        config_dir = hass.config.config_dir
-        file = await hass.async_add_executor_job(open, f"{config_dir}/{uri}", "r")
-        data = file.read()
-        file.close()
-        return data
+    path = await get_data_path(uri, hass)
+    return await hass.async_add_executor_job(_read_file, path)
 
 
 def event_should_trigger(event, entity_id) -> bool:
@@ -0,0 +1,137 @@
+"""Incremental reading of GeoJSON files for the polygonal zones integration."""
+
+from collections.abc import Iterator
+import json
+import re
+from typing import Any, TextIO
+
+# The amount of characters read from the file at once.
+READ_SIZE = 64 * 1024
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class _Reader:
+    """A buffer over a text file that decodes one JSON value at a time.
+
+    Only the part of the file that has not been decoded yet is kept in memory,
+    so the memory used is bounded by the largest single value.
+    """
+
+    def __init__(self, file: TextIO, read_size: int):
+        self._file = file
+        self._read_size = read_size
+        self._buffer = ""
+        self._pos = 0
+
+    def _fill(self, size: int) -> bool:
+        """Read more characters into the buffer, False when the file has ended."""
+        chunk = self._file.read(size)
+        if not chunk:
+            return False
+
+        # drop the part of the buffer that has already been decoded
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def _skip_whitespace(self) -> None:
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer) or not self._fill(self._read_size):
+                return
+
+    def next_char(self) -> str:
+        """Consume the next non whitespace character, empty at the end of the file."""
+        self._skip_whitespace()
+        if self._pos >= len(self._buffer):
+            return ""
+
+        char = self._buffer[self._pos]
+        self._pos += 1
+        return char
+
+    def expect(self, expected: str) -> None:
+        """Consume the next non whitespace character, which must be `expected`."""
+        char = self.next_char()
+        if char != expected:
+            raise ValueError(f"Expected {expected!r} but found {char!r}")
+
+    def peek(self) -> str:
+        """Get the next non whitespace character without consuming it."""
+        self._skip_whitespace()
+        return self._buffer[self._pos : self._pos + 1]
+
+    def decode(self) -> Any:
+        """Decode the next JSON value.
+
+        The buffer is extended until it contains the complete value. The amount
+        read doubles every time, so a large value is not decoded over and over.
+        """
+        self._skip_whitespace()
+        read_size = self._read_size
+
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill(read_size):
+                    raise
+            else:
+                # a number at the end of the buffer might continue in the file
+                if end < len(self._buffer) or not self._fill(read_size):
+                    self._pos = end
+                    return value
+            read_size *= 2
+
+
+def iter_features(file: TextIO, read_size: int = READ_SIZE) -> Iterator[dict]:
+    """Iterate over the features of a GeoJSON FeatureCollection in a file.
+
+    The file is read incrementally and every feature is decoded when it is
+    reached, so the complete document is never held in memory.
+
+    Args:
+        file: The file containing the FeatureCollection, opened in text mode.
+        read_size: The amount of characters to read at once.
+
+    Yields:
+        The decoded features in the order of the file.
+
+    Raises:
+        ValueError: If the file does not contain a valid JSON object.
+
+    """
+    reader = _Reader(file, read_size)
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+
+    while True:
+        key = reader.decode()
+        reader.expect(":")
+
+        if key == "features":
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.next_char()
+            else:
+                while True:
+                    yield reader.decode()
+
+                    char = reader.next_char()
+                    if char == "]":
+                        break
+                    if char != ",":
+                        raise ValueError(f"Expected ',' or ']' but found {char!r}")
+        else:
+            # the other members of the collection are not needed.
+            reader.decode()
+
+        char = reader.next_char()
+        if char == "}":
+            return
+        if char != ",":
+            raise ValueError(f"Expected ',' or '}}' but found {char!r}")
@@ -0,0 +1,350 @@
+"""Uniform grid index of the zones for the polygonal zones integration."""
+
+from itertools import pairwise
+
+import numpy as np
+import shapely
+
+# The smallest size of a cell in degrees, about 11 meters.
+MIN_CELL_SIZE = 1e-4
+# The amount of cells along the extent of a typical zone.
+CELLS_PER_ZONE_EXTENT = 4
+# The average amount of cells a zone may cover before the cells are enlarged.
+MAX_CELLS_PER_ZONE = 64
+# The maximum amount of cells a single query may cover. Larger queries are
+# handled by the STRtree of the zones.
+MAX_QUERY_CELLS = 16
+# The maximum amount of (zone, cell) pairs tested at once while building the
+# index, which limits the memory taken by the boxes of the cells.
+BUILD_CHUNK_CELLS = 1 << 16
+
+# The cell (x, y) has the key `x * _KEY_STRIDE + y + _KEY_OFFSET`.
+_KEY_STRIDE = 1 << 32
+_KEY_OFFSET = 1 << 31
+
+
+def _cell_keys(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """Get the keys of the cells with the given quantized coordinates."""
+    return xs.astype(np.int64) * _KEY_STRIDE + ys.astype(np.int64) + _KEY_OFFSET
+
+
+def _cell_boxes(xs: np.ndarray, ys: np.ndarray, cell_size: float) -> np.ndarray:
+    """Get the boxes of the cells with the given quantized coordinates."""
+    return shapely.box(
+        xs * cell_size, ys * cell_size, (xs + 1) * cell_size, (ys + 1) * cell_size
+    )
+
+
+def _cell_ranges(bounds: np.ndarray, cell_size: float) -> np.ndarray:
+    """Get the first and last cell (x0, y0, x1, y1) covered by the bounds."""
+    return np.floor(np.asarray(bounds) / cell_size).astype(np.int64)
+
+
+def _get_cell_size(bounds: np.ndarray) -> float:
+    """Choose the cell size for zones with the given (minx, miny, maxx, maxy).
+
+    The cells start at a fraction of the size of a typical zone, so most cells
+    inside a zone do not touch its boundary. They are doubled until the zones
+    do not cover more than `MAX_CELLS_PER_ZONE` cells on average, so a few
+    very large zones do not blow up the size of the index.
+    """
+    extents = np.maximum(bounds[:, 2] - bounds[:, 0], bounds[:, 3] - bounds[:, 1])
+    cell_size = max(float(np.median(extents)) / CELLS_PER_ZONE_EXTENT, MIN_CELL_SIZE)
+
+    while True:
+        x0, y0, x1, y1 = _cell_ranges(bounds, cell_size).T
+        if ((x1 - x0 + 1) * (y1 - y0 + 1)).sum() <= MAX_CELLS_PER_ZONE * len(bounds):
+            return cell_size
+        cell_size *= 2
+
+
+def _prepared_copies(geometries: np.ndarray) -> np.ndarray:
+    """Get prepared copies of geometries.
+
+    The geometries themselves are shared with lookups that may run at the same
+    time, so they are not prepared or destroyed while building the index.
+    """
+    copies = shapely.from_wkb(shapely.to_wkb(geometries))
+    shapely.prepare(copies)
+    return copies
+
+
+def _zone_cells(
+    geometries: np.ndarray, bboxes: np.ndarray, cell_size: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """Get the cells that intersect the zones.
+
+    The cells are tested against the zones in chunks of zones, so only the
+    boxes of about `BUILD_CHUNK_CELLS` cells exist at the same time.
+
+    Args:
+        geometries: The prepared geometries of the zones in (lon, lat).
+        bboxes: The (minx, miny, maxx, maxy) of the zones.
+        cell_size: The size of the cells.
+
+    Returns:
+        The key of the cell and the position of the zone of every (cell, zone)
+        pair that intersects.
+
+    """
+    x0, y0, x1, y1 = _cell_ranges(bboxes, cell_size).T
+    heights = y1 - y0 + 1
+    counts = (x1 - x0 + 1) * heights
+
+    # split the zones into chunks of about BUILD_CHUNK_CELLS cells
+    before = np.cumsum(counts) - counts
+    bounds = np.unique(
+        np.append(
+            np.searchsorted(before, np.arange(0, counts.sum(), BUILD_CHUNK_CELLS)),
+            len(bboxes),
+        )
+    )
+
+    keys = [np.empty(0, dtype=np.int64)]
+    zone_ids = [np.empty(0, dtype=np.int64)]
+    for start, end in pairwise(bounds):
+        # every (zone, cell) pair of the cells covered by the bounding boxes
+        # of the zones in the chunk
+        chunk = counts[start:end]
+        zone_idx = np.repeat(np.arange(start, end), chunk)
+        local = np.arange(chunk.sum()) - np.repeat(np.cumsum(chunk) - chunk, chunk)
+        xs = x0[zone_idx] + local // heights[zone_idx]
+        ys = y0[zone_idx] + local % heights[zone_idx]
+
+        hits = shapely.intersects(geometries[zone_idx], _cell_boxes(xs, ys, cell_size))
+        keys.append(_cell_keys(xs[hits], ys[hits]))
+        zone_ids.append(zone_idx[hits])
+    return np.concatenate(keys), np.concatenate(zone_ids)
+
+
+class GridIndex:
+    """A uniform grid over the zones, in (lon, lat) degrees.
+
+    Every cell of the grid that intersects a zone stores the ids of those
+    zones. Cells that lie entirely inside a single zone and intersect no other
+    zone are flagged with that zone: every point in such a cell is in that
+    zone, without testing the polygon. The cells of a point are found by a
+    binary search for the key of its quantized coordinates in the sorted keys.
+
+    The candidates of the cell at row `i` are `zone_ids[offsets[i]:offsets[i + 1]]`
+    in ascending order, and `interior[i]` is the zone the cell is inside or -1.
+    """
+
+    __slots__ = ("cell_size", "interior", "keys", "offsets", "zone_ids")
+
+    def __init__(
+        self,
+        geometries: np.ndarray,
+        bboxes: np.ndarray,
+        previous: "GridIndex | None" = None,
+        matches: tuple[np.ndarray, np.ndarray] | None = None,
+    ):
+        """Build the grid index.
+
+        When most zones are the same as in a previous index, like after editing
+        a few zones, the index is patched instead: the cells of the unchanged
+        zones are taken from the previous index and only the changed zones are
+        tested against their cells. The patched index keeps the cell size of
+        the previous index.
+
+        Args:
+            geometries: The geometries of the zones in (lon, lat).
+            bboxes: The (minx, miny, maxx, maxy) of every zone.
+            previous: The index of the zones before the changes.
+            matches: The positions of the unchanged zones and their positions
+                in the previous index, see `match_zones`.
+
+        """
+        empty = np.empty(0, dtype=np.int64)
+        self.keys: np.ndarray = empty
+        self.offsets: np.ndarray = np.zeros(1, dtype=np.int64)
+        self.zone_ids: np.ndarray = empty
+        self.interior: np.ndarray = empty
+
+        new_idx, old_idx = matches if matches is not None else (empty, empty)
+        if previous is None or not len(previous) or 2 * len(new_idx) < len(bboxes):
+            previous, new_idx, old_idx = None, empty, empty
+
+        if previous is not None:
+            self.cell_size = previous.cell_size
+        else:
+            self.cell_size = _get_cell_size(bboxes) if len(bboxes) else 1.0
+        if len(bboxes) == 0:
+            return
+
+        todo = np.ones(len(bboxes), dtype=bool)
+        todo[new_idx] = False
+        todo = np.flatnonzero(todo)
+        prepared = np.empty(len(bboxes), dtype=object)
+        prepared[todo] = _prepared_copies(geometries[todo])
+        is_prepared = np.zeros(len(bboxes), dtype=bool)
+        is_prepared[todo] = True
+
+        keys, zone_idx = _zone_cells(prepared[todo], bboxes[todo], self.cell_size)
+        zone_idx = todo[zone_idx]
+        # the cells whose zones changed, only those are tested again below
+        changed = keys
+        if previous is not None:
+            size = max(previous.zone_ids.max(initial=-1), old_idx.max(initial=-1))
+            mapping = np.full(size + 1, -1)
+            mapping[old_idx] = new_idx
+            old_keys = np.repeat(previous.keys, np.diff(previous.offsets))
+            old_zones = mapping[previous.zone_ids]
+            kept = old_zones >= 0
+            changed = np.concatenate([changed, old_keys[~kept]])
+            keys = np.concatenate([old_keys[kept], keys])
+            zone_idx = np.concatenate([old_zones[kept], zone_idx])
+
+        order = np.lexsort((zone_idx, keys))
+        keys, zone_idx = keys[order], zone_idx[order]
+
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = keys[1:] != keys[:-1]
+        starts = np.flatnonzero(first)
+        single = np.diff(np.append(starts, len(keys))) == 1
+
+        # the other cells are the same as in the previous index
+        interior = np.full(len(starts), -1)
+        test = np.ones(len(starts), dtype=bool)
+        if previous is not None:
+            test = np.isin(keys[starts], changed)
+            same = np.flatnonzero(~test)
+            rows = previous.keys.searchsorted(keys[starts[same]])
+            inside = previous.interior[rows]
+            interior[same] = np.where(inside >= 0, mapping[inside], -1)
+
+        # the cells with a single zone that are completely inside it
+        tested = np.flatnonzero(single & test)
+        cells = starts[tested]
+        missing = np.unique(zone_idx[cells])
+        missing = missing[~is_prepared[missing]]
+        prepared[missing] = _prepared_copies(geometries[missing])
+        xs, ys = np.divmod(keys[cells], _KEY_STRIDE)
+        inside = shapely.contains(
+            prepared[zone_idx[cells]],
+            _cell_boxes(xs, ys - _KEY_OFFSET, self.cell_size),
+        )
+        interior[tested[inside]] = zone_idx[cells[inside]]
+
+        self.keys = keys[starts]
+        self.offsets = np.append(starts, len(keys))
+        self.zone_ids = zone_idx
+        self.interior = interior
+
+    def __len__(self) -> int:
+        """Return the amount of cells that intersect a zone."""
+        return len(self.keys)
+
+    def query(
+        self, minx: float, miny: float, maxx: float, maxy: float
+    ) -> tuple[np.ndarray, int | None] | None:
+        """Get the candidate zones of the cells covered by the bounds.
+
+        Args:
+            minx: The minimum longitude of the bounds.
+            miny: The minimum latitude of the bounds.
+            maxx: The maximum longitude of the bounds.
+            maxy: The maximum latitude of the bounds.
+
+        Returns:
+            The sorted ids of the candidate zones and the zone that contains
+            the bounds when all the cells are flagged inside that zone, or None
+            if the bounds cover more than `MAX_QUERY_CELLS` cells.
+
+        """
+        x0, y0, x1, y1 = _cell_ranges((minx, miny, maxx, maxy), self.cell_size).tolist()
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > MAX_QUERY_CELLS:
+            return None
+
+        keys = np.array(
+            [
+                x * _KEY_STRIDE + y + _KEY_OFFSET
+                for x in range(x0, x1 + 1)
+                for y in range(y0, y1 + 1)
+            ],
+            dtype=np.int64,
+        )
+        rows = self.keys.searchsorted(keys)
+        rows[rows == len(self.keys)] = 0
+        rows = rows[self.keys[rows] == keys] if len(self.keys) else rows[:0]
+        if not len(rows):
+            return np.empty(0, dtype=np.int64), None
+
+        if len(rows) == 1:
+            row = rows[0]
+            candidates = self.zone_ids[self.offsets[row] : self.offsets[row + 1]]
+        else:
+            candidates = np.unique(
+                np.concatenate(
+                    [self.zone_ids[self.offsets[r] : self.offsets[r + 1]] for r in rows]
+                )
+            )
+
+        # the bounds are inside a zone only if every cell they cover is
+        cells = (x1 - x0 + 1) * (y1 - y0 + 1)
+        interior = self.interior[rows]
+        if len(rows) == cells and interior[0] >= 0 and (interior == interior[0]).all():
+            return candidates, int(interior[0])
+        return candidates, None
+
+    def query_bulk(
+        self, bounds: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Get the candidate zones for many bounds at once.
+
+        Args:
+            bounds: The (minx, miny, maxx, maxy) of every query.
+
+        Returns:
+            The (query, zone) pairs of the candidates, the zone that contains
+            each query or -1 like `query`, and a mask of the queries that were
+            handled. The queries covering more than `MAX_QUERY_CELLS` cells are
+            not handled and have no pairs.
+
+        """
+        x0, y0, x1, y1 = _cell_ranges(bounds, self.cell_size).T
+        heights = y1 - y0 + 1
+        counts = (x1 - x0 + 1) * heights
+        handled = counts <= MAX_QUERY_CELLS
+        counts[~handled] = 0
+
+        # every (query, cell) pair of the cells covered by the bounds
+        query_idx = np.repeat(np.arange(len(bounds)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        keys = _cell_keys(
+            x0[query_idx] + local // heights[query_idx],
+            y0[query_idx] + local % heights[query_idx],
+        )
+
+        rows = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = self.keys[rows] == keys if len(self.keys) else np.zeros(0, bool)
+        query_idx, rows = query_idx[found], rows[found]
+
+        # the queries that only cover cells inside the same zone
+        interior = self.interior[rows]
+        found_cells = np.bincount(query_idx, minlength=len(bounds))
+        inside_cells = np.bincount(
+            query_idx, weights=interior >= 0, minlength=len(bounds)
+        )
+        lowest = np.full(len(bounds), np.iinfo(np.int64).max)
+        highest = np.full(len(bounds), -1)
+        np.minimum.at(lowest, query_idx, interior)
+        np.maximum.at(highest, query_idx, interior)
+        inside = np.where(
+            (found_cells == counts) & (inside_cells == counts) & (lowest == highest),
+            highest,
+            -1,
+        )
+        inside[counts == 0] = -1
+
+        # expand the cells into their candidate zones, without duplicates
+        starts = self.offsets[rows]
+        sizes = self.offsets[rows + 1] - starts
+        pair_query = np.repeat(query_idx, sizes)
+        pair_zone = self.zone_ids[
+            np.repeat(starts - (np.cumsum(sizes) - sizes), sizes)
+            + np.arange(sizes.sum())
+        ]
+        zone_count = int(self.zone_ids.max()) + 1 if len(self.zone_ids) else 1
+        pairs = np.unique(pair_query * zone_count + pair_zone)
+        return pairs // zone_count, pairs % zone_count, inside, handled
@@ -3,15 +3,16 @@
 import json
 from pathlib import Path
 
-import pandas as pd
 from shapely import to_geojson
 
 from homeassistant.core import HomeAssistant
 
+from .general import write_file_atomic
+from .zone_set import ZoneSet
 from .zones import get_zones
 
 
-def zones_to_geojson(zones: pd.DataFrame):
+def zones_to_geojson(zones: ZoneSet):
     """Convert the zones to GeoJSON."""
     return json.dumps(
         {
@@ -20,12 +21,14 @@ def zones_to_geojson(zones: pd.DataFrame):
                 {
                     "type": "Feature",
                     "properties": {
-                        "name": zone.name,
-                        "priority": zone.priority,
+                        "name": name,
+                        "priority": int(priority)
+                        if priority.is_integer()
+                        else priority,
                     },
-                    "geometry": json.loads(to_geojson(zone.geometry)),
+                    "geometry": json.loads(to_geojson(geometry)),
                 }
-                for zone in zones.itertuples()
+                for name, priority, geometry in zones
             ],
         }
     )
@@ -36,7 +39,7 @@ async def download_zones(
 ):
     """Download the zones in sources_uris to."""
     zones = await get_zones(source_uris, hass, prioritize)
-    geo_json = zones_to_geojson(zones)
+    geo_json = await hass.async_add_executor_job(zones_to_geojson, zones)
 
     dest_uri.parent.mkdir(parents=True, exist_ok=True)
 
@@ -52,7 +55,4 @@ async def save_zones(geojson: str, destination: Path, hass: HomeAssistant):
         hass: The homeassistant instance.
 
     """
-
-    file = await hass.async_add_executor_job(open, destination, "w")
-    file.write(geojson)
-    file.close()
+    await hass.async_add_executor_job(write_file_atomic, destination, geojson)
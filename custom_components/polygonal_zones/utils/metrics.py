@@ -0,0 +1,79 @@
+"""Counters and latency histograms for the polygonal zones integration.
+
+Collecting metrics is optional. The functions that record them take a
+`Metrics` instance or None, and only measure anything when they get one, so
+the cost when the metrics are disabled is a single comparison.
+
+The recorded metrics are:
+
+- counters: `lookups`, `lookup_candidates`, `grid_interior_hits`,
+  `fast_path_hits`, `fast_path_misses`, `entity_updates`, `updates_coalesced`,
+  `writes_skipped`, `zone_loads`, `sources_parsed`, `sources_unchanged`,
+  `http_requests`, `http_not_modified` and `bytes_fetched`.
+- histograms: `lookup`, `entity_update`, `zone_load` and `source_parse`.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+import time
+
+# The upper bounds of the buckets of the latency histograms, in milliseconds.
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000, 10000)
+
+
+class Histogram:
+    """The distribution of a latency over the fixed `LATENCY_BUCKETS`."""
+
+    __slots__ = ("counts", "maximum", "total")
+
+    def __init__(self):
+        """Initialize an empty histogram."""
+        # the last bucket holds the values above the largest bound
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, milliseconds: float) -> None:
+        """Add a single value to the histogram."""
+        self.counts[bisect_left(LATENCY_BUCKETS, milliseconds)] += 1
+        self.total += milliseconds
+        self.maximum = max(self.maximum, milliseconds)
+
+    def as_dict(self) -> dict:
+        """Get the histogram as a JSON serializable dict."""
+        count = sum(self.counts)
+        bounds = [f"<={bound}ms" for bound in LATENCY_BUCKETS] + ["inf"]
+        return {
+            "count": count,
+            "mean_ms": self.total / count if count else None,
+            "max_ms": self.maximum,
+            "buckets": dict(zip(bounds, self.counts)),
+        }
+
+
+class Metrics:
+    """The counters and latency histograms of a config entry."""
+
+    def __init__(self):
+        """Initialize the metrics without any values."""
+        self.started = time.time()
+        self.counters: defaultdict[str, int] = defaultdict(int)
+        self.histograms: defaultdict[str, Histogram] = defaultdict(Histogram)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """Increase a counter."""
+        self.counters[name] += amount
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Add a duration in seconds to a latency histogram."""
+        self.histograms[name].observe(seconds * 1000)
+
+    def as_dict(self) -> dict:
+        """Get all the metrics as a JSON serializable dict."""
+        return {
+            "collecting_for_s": time.time() - self.started,
+            "counters": dict(self.counters),
+            "histograms": {
+                name: histogram.as_dict() for name, histogram in self.histograms.items()
+            },
+        }
@@ -0,0 +1,140 @@
+"""Profiling of the zone lookups for the polygonal zones integration."""
+
+import cProfile
+from pathlib import Path
+import pstats
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+from .zone_set import EARTH_RADIUS, ZoneSet
+from .zones import get_locations_zone
+
+# tracemalloc traces the whole process, so only one profile runs at a time.
+_PROFILE_LOCK = threading.Lock()
+
+
+def get_jittered_fixes(
+    fixes: list[tuple[float, float, float]], samples: int, jitter: float, seed: int
+) -> list[tuple[float, float, float]]:
+    """Get samples around GPS fixes, each moved in a random direction.
+
+    Args:
+        fixes: The (latitude, longitude, accuracy) of the fixes to start from.
+        samples: The amount of samples.
+        jitter: The maximum distance of a sample to its fix in meters.
+        seed: The seed of the random generator.
+
+    Returns:
+        The (latitude, longitude, accuracy) of the samples, starting with the
+        fixes themselves.
+
+    """
+    rng = np.random.default_rng(seed)
+    base = np.array(fixes, dtype=float)[np.arange(samples) % len(fixes)]
+
+    # uniformly spread over the circle around the fix
+    distances = jitter * np.sqrt(rng.uniform(0, 1, samples))
+    distances[: len(fixes)] = 0
+    angles = rng.uniform(0, 2 * np.pi, samples)
+    lats = base[:, 0] + np.degrees(distances * np.cos(angles) / EARTH_RADIUS)
+    lons = base[:, 1] + np.degrees(
+        distances * np.sin(angles) / (EARTH_RADIUS * np.cos(np.radians(base[:, 0])))
+    )
+    return list(zip(lats.tolist(), lons.tolist(), base[:, 2].tolist()))
+
+
+def _location(filename: str, line: int, name: str) -> str:
+    """Get a short description of a profiled function."""
+    return f"{Path(filename).name}:{line}({name})" if line else name
+
+
+def profile_lookups(
+    zones: ZoneSet, fixes: list[tuple[float, float, float]], top: int
+) -> dict:
+    """Profile the lookups of GPS fixes in the zones. This is blocking.
+
+    The fixes are looked up twice: once under cProfile for the time spent in
+    every function, and once under tracemalloc for the memory allocated. The
+    two are not combined, as tracing the allocations slows the lookups down.
+
+    Args:
+        zones: The loaded zones.
+        fixes: The (latitude, longitude, accuracy) of the fixes.
+        top: The amount of functions and allocation sites in the report.
+
+    Returns:
+        The duration of the lookups, the functions with the highest cumulative
+        time, the peak of the memory allocated during the lookups and the lines
+        that allocated the memory still in use after the lookups.
+
+    """
+    with _PROFILE_LOCK:
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        matched = 0
+        profiler.enable()
+        try:
+            for lat, lon, acc in fixes:
+                if get_locations_zone(lat, lon, acc, zones) is not None:
+                    matched += 1
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - start
+
+        stats = pstats.Stats(profiler)
+        functions = sorted(
+            stats.stats.items(), key=lambda item: item[1][3], reverse=True
+        )[:top]
+
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            in_use, _ = tracemalloc.get_traced_memory()
+            for lat, lon, acc in fixes:
+                get_locations_zone(lat, lon, acc, zones)
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+    # the snapshots themselves are not part of the lookups
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    retained = after.filter_traces(ignored).compare_to(
+        before.filter_traces(ignored), "lineno"
+    )
+    return {
+        "lookups": len(fixes),
+        "matched": matched,
+        "duration_ms": duration * 1000,
+        "mean_lookup_us": duration * 1e6 / max(len(fixes), 1),
+        "functions": [
+            {
+                "function": _location(*function),
+                "calls": calls,
+                "own_ms": own * 1000,
+                "cumulative_ms": cumulative * 1000,
+            }
+            for function, (_, calls, own, cumulative, _) in functions
+        ],
+        "allocations": {
+            "peak_bytes": peak - in_use,
+            "retained_bytes": sum(stat.size_diff for stat in retained),
+            "retained": [
+                {
+                    "line": f"{Path(stat.traceback[0].filename).name}:"
+                    f"{stat.traceback[0].lineno}",
+                    "size_bytes": stat.size_diff,
+                    "count": stat.count_diff,
+                }
+                for stat in retained[:top]
+                if stat.size_diff
+            ],
+        },
+    }
@@ -0,0 +1,179 @@
+"""Editable in-memory copy of a zone file for the polygonal zones integration."""
+
+from pathlib import Path
+
+from shapely.geometry import shape
+from shapely.geometry.base import BaseGeometry
+
+from .geojson_stream import iter_features
+from .zone_set import INDEX_STRTREE, ZoneSet
+from .zones import SourceZones
+
+
+def _parse_feature(feature: dict) -> tuple[str, BaseGeometry]:
+    """Get the name and the geometry of a GeoJSON feature.
+
+    Raises:
+        ValueError: If the feature has no name or no valid geometry.
+        TypeError: If the name of the feature is not a string.
+
+    """
+    try:
+        name = feature["properties"]["name"]
+        geometry = shape(feature["geometry"])
+    except (AttributeError, KeyError, TypeError, ValueError) as err:
+        raise ValueError(f"Invalid zone feature: {err!r}") from err
+
+    if not isinstance(name, str):
+        raise TypeError(f"Invalid zone name: {name!r}")
+    return name, geometry
+
+
+class ZoneRepository:
+    """The features of an editable zone file, keyed by the name of the zone.
+
+    The actions change the features in memory, which takes constant time for a
+    single zone. The geometries are parsed once when a feature is stored, so
+    building the zones of the changed file does not parse the file again.
+    """
+
+    def __init__(self, features: list[dict] | None = None):
+        """Initialize the repository.
+
+        Args:
+            features: The GeoJSON features of the zones. A later feature
+                replaces an earlier feature with the same name.
+
+        Raises:
+            ValueError: If one of the features is not a valid zone.
+            TypeError: If the name of one of the features is not a string.
+
+        """
+        self._features: dict[str, dict] = {}
+        self._geometries: dict[str, BaseGeometry] = {}
+        for feature in features or []:
+            name, geometry = _parse_feature(feature)
+            self._features[name] = feature
+            self._geometries[name] = geometry
+
+    @classmethod
+    def from_file(cls, path: Path) -> "ZoneRepository":
+        """Read the repository from a GeoJSON file. This is blocking."""
+        with open(path, encoding="utf-8") as file:
+            return cls(list(iter_features(file)))
+
+    def __len__(self) -> int:
+        """Return the amount of zones in the repository."""
+        return len(self._features)
+
+    def __contains__(self, name: str) -> bool:
+        """Check if a zone with the name exists."""
+        return name in self._features
+
+    def add(self, feature: dict) -> str:
+        """Add a new zone.
+
+        Raises:
+            KeyError: If a zone with the same name already exists.
+            ValueError: If the feature is not a valid zone.
+            TypeError: If the name of the feature is not a string.
+
+        """
+        name, geometry = _parse_feature(feature)
+        if name in self._features:
+            raise KeyError(name)
+
+        self._features[name] = feature
+        self._geometries[name] = geometry
+        return name
+
+    def edit(self, name: str, feature: dict) -> str:
+        """Replace the zone with the given name by a feature.
+
+        The zone keeps its position in the file, unless the feature renames it.
+
+        Raises:
+            KeyError: If there is no zone with the name, or when renaming, if
+                the new name is already taken by another zone.
+            ValueError: If the feature is not a valid zone.
+            TypeError: If the name of the feature is not a string.
+
+        """
+        new_name, geometry = _parse_feature(feature)
+        if name not in self._features:
+            raise KeyError(name)
+        if new_name != name and new_name in self._features:
+            raise KeyError(new_name)
+
+        if new_name != name:
+            self.delete(name)
+        self._features[new_name] = feature
+        self._geometries[new_name] = geometry
+        return new_name
+
+    def delete(self, name: str) -> None:
+        """Delete the zone with the given name.
+
+        Raises:
+            KeyError: If there is no zone with the name.
+
+        """
+        del self._features[name]
+        del self._geometries[name]
+
+    def replace(self, features: list[dict]) -> None:
+        """Replace all the zones by the features.
+
+        Raises:
+            ValueError: If one of the features is not a valid zone, in which
+                case the zones are not changed.
+            TypeError: If the name of one of the features is not a string, in
+                which case the zones are not changed either.
+
+        """
+        repository = ZoneRepository(features)
+        self._features = repository._features
+        self._geometries = repository._geometries
+
+    def snapshot(self) -> tuple[list[dict], list[BaseGeometry]]:
+        """Get the current features and geometries.
+
+        The lists are copies, so they can be used in the executor while the
+        repository keeps changing on the event loop.
+        """
+        return list(self._features.values()), list(self._geometries.values())
+
+
+def build_zones(
+    features: list[dict],
+    geometries: list[BaseGeometry],
+    index: str = INDEX_STRTREE,
+    previous: ZoneSet | None = None,
+) -> tuple[SourceZones, ZoneSet]:
+    """Build the zones of a snapshot.
+
+    This is blocking, so run it in the executor.
+
+    Args:
+        features: The features of the snapshot.
+        geometries: The parsed geometries of the features.
+        index: The index used to find the candidate zones, see `ZoneSet`.
+        previous: The zones before the changes, see `ZoneSet`.
+
+    Returns:
+        The zones of the file as if they were parsed from it and the zones ready
+        for the lookups. The digest of the source is empty, as the snapshot
+        has not been written yet.
+
+    """
+    properties = [feature["properties"] for feature in features]
+    source = SourceZones(
+        "",
+        [prop["name"] for prop in properties],
+        [prop.get("priority") for prop in properties],
+        geometries,
+    )
+
+    priorities = [0 if priority is None else priority for priority in source.priorities]
+    zones = ZoneSet(source.names, priorities, geometries, index, previous)
+    return source, zones
@@ -0,0 +1,340 @@
+"""Compact storage of the loaded zones for the polygonal zones integration."""
+
+from collections.abc import Iterator, Sequence
+from typing import NamedTuple
+
+import numpy as np
+import shapely
+from shapely import STRtree
+from shapely.geometry.base import BaseGeometry
+
+from .grid_index import GridIndex
+
+# Radius of the earth in meters
+EARTH_RADIUS = 6371000
+
+# The spatial indexes used to find the candidate zones of a lookup.
+INDEX_STRTREE = "strtree"
+INDEX_GRID = "grid"
+INDEXES = [INDEX_STRTREE, INDEX_GRID]
+
+# Zones with more vertices than this get simplified shells, see `get_shells`.
+SHELL_MIN_VERTICES = 64
+# The tolerance in meters of the simplification of the zones for their shells.
+SHELL_TOLERANCE = 5.0
+
+
+def to_local_frame(
+    lats: np.ndarray, lons: np.ndarray, origins: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Project coordinates into the local metric frames of their zones.
+
+    The frame of a zone is an azimuthal equidistant projection of the sphere
+    centered on the centroid of the zone. Distances to the centroid are exact
+    and around the zone the distortion is negligible, so distances in the
+    frame are in meters at any latitude.
+
+    Args:
+        lats: The latitudes to project (in radians)
+        lons: The longitudes to project (in radians)
+        origins: The (latitude, longitude) of the frame of every coordinate
+            (in radians)
+
+    Returns:
+        The x and y coordinates in meters.
+
+    """
+    origin_lats = origins[:, 0]
+    dlon = lons - origins[:, 1]
+    cos_lats = np.cos(lats)
+    sin_half_dlon = np.sin(dlon / 2) ** 2
+
+    # the angular distance to the origin, using the haversine formula
+    a = np.sin((lats - origin_lats) / 2) ** 2 + np.cos(origin_lats) * cos_lats * (
+        sin_half_dlon
+    )
+    c = 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    k = np.divide(c, np.sin(c), out=np.ones_like(c), where=c > 0)
+
+    x = EARTH_RADIUS * k * cos_lats * np.sin(dlon)
+    y = (
+        EARTH_RADIUS
+        * k
+        * (
+            np.sin(lats - origin_lats)
+            + 2 * np.sin(origin_lats) * cos_lats * sin_half_dlon
+        )
+    )
+    return x, y
+
+
+def get_shells(geometries: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Get simplified inner and outer shells of detailed zones in meters.
+
+    The inner shell lies completely inside its zone and the outer shell
+    contains the complete zone. Both follow the zone at a distance of a few
+    `SHELL_TOLERANCE` with far fewer vertices, so they are much cheaper to test
+    than the zone itself and decide most lookups.
+
+    The zone is first simplified within the tolerance, which keeps its
+    topology, and the simplified zone is grown and shrunk by twice the
+    tolerance. Buffering the simplified zone is much faster than buffering the
+    zone itself. Zones with up to `SHELL_MIN_VERTICES` vertices are cheap
+    enough, they are their own shells.
+
+    Args:
+        geometries: The prepared zones in their local metric frames.
+
+    Returns:
+        The prepared inner and outer shells of the zones and whether each zone
+        got shells that differ from the zone.
+
+    """
+    inner = geometries.copy()
+    outer = geometries.copy()
+    shelled = shapely.get_num_coordinates(geometries) > SHELL_MIN_VERTICES
+    if shelled.any():
+        simplified = shapely.simplify(geometries[shelled], SHELL_TOLERANCE)
+        margin = 2 * SHELL_TOLERANCE
+        # few segments per arc, their chords stay well outside the tolerance
+        inner[shelled] = shapely.buffer(simplified, -margin, quad_segs=2)
+        outer[shelled] = shapely.buffer(simplified, margin, quad_segs=2)
+        shapely.prepare(inner[shelled])
+        shapely.prepare(outer[shelled])
+    return inner, outer, shelled
+
+
+class ZoneSet:
+    """The loaded zones and the data derived from them.
+
+    Every attribute of a zone is stored in an array indexed by the position of
+    the zone, so zone `i` has name `names[i]`, priority `priorities[i]` and so
+    on. Everything the lookups need is computed once when the set is created:
+
+    - the geometries are indexed in an STRtree and, when selected, in a
+      `GridIndex` which then selects the candidates of the lookups instead.
+    - the bounding boxes are stored as (minx, miny, maxx, maxy).
+    - the centroids are stored as (latitude, longitude) in radians.
+    - the geometries are projected into the local metric frame of their zone
+      (see `to_local_frame`) and prepared. All exact tests are done on these.
+    - the detailed projected zones get simplified inner and outer shells, which
+      decide most tests without the full zone (see `get_shells`). `shelled`
+      tells which zones have them, the other zones are their own shells.
+    - the edges of the exteriors of all projected zones are stored in single
+      arrays. Every edge is stored as its start point and the vector to its
+      end point. The edges of zone `i` are at
+      `edge_offsets[i]:edge_offsets[i + 1]` of these arrays.
+
+    A ZoneSet is never modified after it is created, so replacing it swaps the
+    zones and all their derived data in a single assignment.
+    """
+
+    __slots__ = (
+        "bboxes",
+        "centroids",
+        "edge_offsets",
+        "edge_starts",
+        "edge_vectors",
+        "geometries",
+        "grid",
+        "inner",
+        "names",
+        "outer",
+        "priorities",
+        "projected",
+        "shelled",
+        "tree",
+    )
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        priorities: Sequence[float],
+        geometries: Sequence[BaseGeometry],
+        index: str = INDEX_STRTREE,
+        previous: "ZoneSet | None" = None,
+    ):
+        """Create the zone set and derive the data needed for the lookups.
+
+        Args:
+            names: The names of the zones.
+            priorities: The priorities of the zones. Lower is more important.
+            geometries: The shapely geometries of the zones in (lon, lat).
+            index: The index used to find the candidate zones, one of `INDEXES`.
+            previous: The zones this set replaces. The derived data of the zones
+                that did not change is taken from it instead of computed again.
+
+        """
+        self.names: list[str] = list(names)
+        self.priorities: np.ndarray = np.asarray(priorities, dtype=float)
+        self.geometries: np.ndarray = np.empty(len(self.names), dtype=object)
+        self.geometries[:] = geometries
+
+        # the zones that did not change since the previous set keep their
+        # centroid, projection and grid cells, only the other zones are
+        # projected and indexed again.
+        count = len(self.names)
+        new_idx, old_idx = (
+            match_zones(previous, self.names, self.geometries)
+            if previous is not None
+            else (np.empty(0, dtype=np.int64),) * 2
+        )
+
+        self.tree = STRtree(self.geometries)
+        self.bboxes: np.ndarray = shapely.bounds(self.geometries).reshape(-1, 4)
+        self.grid: GridIndex | None = (
+            GridIndex(
+                self.geometries,
+                self.bboxes,
+                previous.grid if previous is not None else None,
+                (new_idx, old_idx),
+            )
+            if index == INDEX_GRID
+            else None
+        )
+        todo = np.ones(count, dtype=bool)
+        todo[new_idx] = False
+        todo = np.flatnonzero(todo)
+        geometries = self.geometries[todo]
+
+        centroids = shapely.centroid(geometries)
+        self.centroids: np.ndarray = np.empty((count, 2))
+        self.centroids[new_idx] = previous.centroids[old_idx] if new_idx.size else 0
+        self.centroids[todo] = np.radians(
+            np.column_stack([shapely.get_y(centroids), shapely.get_x(centroids)])
+        )
+
+        # project every zone into its own frame. transform passes the
+        # coordinates of all geometries in the same order as get_coordinates.
+        _, coord_zone = shapely.get_coordinates(geometries, return_index=True)
+        origins = self.centroids[todo][coord_zone]
+
+        def project(coords: np.ndarray) -> np.ndarray:
+            coords = np.radians(coords)
+            return np.column_stack(to_local_frame(coords[:, 1], coords[:, 0], origins))
+
+        projected = shapely.transform(geometries, project)
+        shapely.prepare(projected)
+        self.projected: np.ndarray = np.empty(count, dtype=object)
+        self.projected[new_idx] = previous.projected[old_idx] if new_idx.size else None
+        self.projected[todo] = projected
+
+        inner, outer, shelled = get_shells(projected)
+        self.inner: np.ndarray = np.empty(count, dtype=object)
+        self.outer: np.ndarray = np.empty(count, dtype=object)
+        self.shelled: np.ndarray = np.zeros(count, dtype=bool)
+        if new_idx.size:
+            self.inner[new_idx] = previous.inner[old_idx]
+            self.outer[new_idx] = previous.outer[old_idx]
+            self.shelled[new_idx] = previous.shelled[old_idx]
+        self.inner[todo] = inner
+        self.outer[todo] = outer
+        self.shelled[todo] = shelled
+
+        # the edges of the exterior rings of all polygons in the zones
+        parts, part_zone = shapely.get_parts(self.projected, return_index=True)
+        coords, ring_idx = shapely.get_coordinates(
+            shapely.get_exterior_ring(parts), return_index=True
+        )
+        is_edge = ring_idx[:-1] == ring_idx[1:]
+        starts = coords[:-1][is_edge]
+        self.edge_starts: np.ndarray = starts
+        self.edge_vectors: np.ndarray = coords[1:][is_edge] - starts
+        self.edge_offsets: np.ndarray = np.searchsorted(
+            part_zone[ring_idx[:-1][is_edge]], np.arange(len(self.names) + 1)
+        )
+
+    def __len__(self) -> int:
+        """Return the amount of zones in the set."""
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[tuple[str, float, BaseGeometry]]:
+        """Iterate over the (name, priority, geometry) of the zones."""
+        return zip(self.names, self.priorities.tolist(), self.geometries)
+
+
+def match_zones(
+    previous: ZoneSet, names: Sequence[str], geometries: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Find the zones that have the same name and geometry in a previous set.
+
+    Args:
+        previous: The previous zones.
+        names: The names of the zones.
+        geometries: The geometries of the zones.
+
+    Returns:
+        The indexes of the matching zones and the indexes of the same zones in
+        the previous set.
+
+    """
+    positions = {name: idx for idx, name in enumerate(previous.names)}
+    new_idx = np.array(
+        [idx for idx, name in enumerate(names) if name in positions], dtype=np.int64
+    )
+    old_idx = np.array([positions[names[idx]] for idx in new_idx], dtype=np.int64)
+
+    # unchanged files give the same geometry objects, which compare instantly
+    same = shapely.equals_exact(
+        previous.geometries[old_idx], geometries[new_idx], tolerance=0
+    )
+    return new_idx[same], old_idx[same]
+
+
+class ZoneChanges(NamedTuple):
+    """The zones that differ between two zone sets.
+
+    A zone that changed its geometry or priority is in `changed`. The bounds
+    contain the (minx, miny, maxx, maxy) of the old and new geometries of all
+    the zones that differ.
+    """
+
+    added: list[str]
+    changed: list[str]
+    removed: list[str]
+    bounds: np.ndarray
+
+    def __bool__(self) -> bool:
+        """Return if any zone differs."""
+        return len(self.bounds) > 0
+
+    def affects(self, bounds: np.ndarray) -> bool:
+        """Check if any of the zones that differ overlap the (lon, lat) bounds."""
+        minx, miny, maxx, maxy = bounds
+        return bool(
+            (
+                (self.bounds[:, 0] <= maxx)
+                & (self.bounds[:, 2] >= minx)
+                & (self.bounds[:, 1] <= maxy)
+                & (self.bounds[:, 3] >= miny)
+            ).any()
+        )
+
+
+def get_zone_changes(previous: ZoneSet, zones: ZoneSet) -> ZoneChanges:
+    """Get the zones that differ between two zone sets.
+
+    Args:
+        previous: The old zones.
+        zones: The new zones.
+
+    Returns:
+        The added, changed and removed zones.
+
+    """
+    new_idx, old_idx = match_zones(previous, zones.names, zones.geometries)
+    same = zones.priorities[new_idx] == previous.priorities[old_idx]
+
+    new_changed = np.ones(len(zones), dtype=bool)
+    new_changed[new_idx[same]] = False
+    old_changed = np.ones(len(previous), dtype=bool)
+    old_changed[old_idx[same]] = False
+
+    new_names = {zones.names[idx] for idx in np.flatnonzero(new_changed)}
+    old_names = {previous.names[idx] for idx in np.flatnonzero(old_changed)}
+    return ZoneChanges(
+        sorted(new_names - set(previous.names)),
+        sorted(new_names & old_names),
+        sorted(old_names - set(zones.names)),
+        np.concatenate([zones.bboxes[new_changed], previous.bboxes[old_changed]]),
+    )
@@ -0,0 +1,516 @@
+"""Shared storage of the loaded zones for the polygonal zones integration."""
+
+import asyncio
+from collections.abc import Callable, Coroutine
+from datetime import timedelta
+import logging
+import os
+from pathlib import Path
+import random
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+
+from .general import get_data_path
+from .metrics import Metrics
+from .zone_repository import ZoneRepository, build_zones
+from .zone_set import INDEX_STRTREE, ZoneChanges, ZoneSet, get_zone_changes
+from .zone_writer import ZoneFileWriter
+from .zones import SourceZones, get_source_digest, get_zones
+
+_LOGGER = logging.getLogger(__name__)
+
+# The interval at which the local zone files are checked for changes.
+WATCH_INTERVAL = timedelta(seconds=10)
+# The fraction by which the refresh interval is randomly changed, so the
+# instances polling the same server do not all request it at the same time.
+REFRESH_JITTER = 0.1
+# The longest time between refreshes while the remote files keep failing.
+MAX_REFRESH_BACKOFF = timedelta(hours=6)
+
+ZonesListener = Callable[[ZoneSet, ZoneChanges | None], Coroutine[Any, Any, None]]
+FileStats = dict[str, tuple[int, int] | None]
+
+
+def _stat_files(paths: dict[str, Path]) -> FileStats:
+    """Get the modification time and size of files, None for missing files.
+
+    This is blocking, so run it in the executor.
+    """
+    stats = {}
+    for uri, path in paths.items():
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stats[uri] = None
+        else:
+            stats[uri] = (stat.st_mtime_ns, stat.st_size)
+    return stats
+
+
+def _is_remote(uri: str) -> bool:
+    """Check if the uri points to a website instead of a local file."""
+    return uri.startswith(("http://", "https://"))
+
+
+class ZoneStore:
+    """The zones of a config entry, loaded once and shared by all its entities.
+
+    Entities acquire the store when they are added and release it when they are
+    removed. Once the last entity released the store the zones are dropped so
+    they no longer take up memory. A reload is passed to every registered
+    listener, together with the zones that changed.
+
+    While the store is in use the local zone files are checked for changes
+    every `WATCH_INTERVAL`, and reloaded when their modification time or size
+    changed. The remote zone files are fetched again every refresh interval,
+    if one is set, and only reloaded when their content changed.
+
+    The zones of an editable store come from a single local file. Its zones
+    are changed through a `ZoneRepository`, after which the store passes the
+    new zones to the listeners without parsing the file. The file itself is
+    written in the background by a `ZoneFileWriter`.
+
+    The loads and the saves of the repository hold the same lock, so a save
+    is never overwritten by a load of the file it has not been written to.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        uris: list[str],
+        prioritize: bool,
+        index: str = INDEX_STRTREE,
+        editable: bool = False,
+        refresh_interval: timedelta = timedelta(0),
+        collect_metrics: bool = False,
+    ):
+        """Initialize the store.
+
+        Args:
+            hass: The homeassistant instance.
+            uris: The uris of the files containing the zones.
+            prioritize: boolean if we want to prioritize the zones in order.
+            index: The index used to find the candidate zones, see `ZoneSet`.
+            editable: If the zones are stored in a single local file that can
+                be changed through the repository.
+            refresh_interval: The time between the checks of the remote files
+                for changes. Remote files are not checked when it is zero.
+            collect_metrics: If the metrics of the loads and lookups of the
+                zones are collected.
+
+        """
+        self._hass = hass
+        self._uris = uris
+        self._prioritize = prioritize
+        self._index = index
+        self._editable = editable
+        self._refresh_interval = refresh_interval
+        self._metrics = Metrics() if collect_metrics else None
+
+        self._zones: ZoneSet | None = None
+        self._sources: dict[str, SourceZones] = {}
+        self._listeners: list[ZonesListener] = []
+        self._references = 0
+        self._load_task: asyncio.Task | None = None
+        self._reload_task: asyncio.Task | None = None
+        self._repository: ZoneRepository | None = None
+        self._writer: ZoneFileWriter | None = None
+        self._unwritten: tuple[list[dict], SourceZones] | None = None
+        self._lock = asyncio.Lock()
+        self._file_stats: FileStats | None = None
+        self._unsub_watch: Callable[[], None] | None = None
+        self._unsub_refresh: Callable[[], None] | None = None
+        self._refresh_failures = 0
+
+    @property
+    def uris(self) -> list[str]:
+        """List of the uris where the zones are stored."""
+        return self._uris
+
+    @property
+    def prioritize(self) -> bool:
+        """Are the zone files prioritized in order."""
+        return self._prioritize
+
+    @property
+    def index(self) -> str:
+        """The index used to find the candidate zones of the lookups."""
+        return self._index
+
+    @property
+    def editable(self) -> bool:
+        """Can the zones be changed through the repository."""
+        return self._editable
+
+    @property
+    def refresh_interval(self) -> timedelta:
+        """The time between the checks of the remote files for changes."""
+        return self._refresh_interval
+
+    @property
+    def metrics(self) -> Metrics | None:
+        """The metrics of the zones, None if they are not collected."""
+        return self._metrics
+
+    @property
+    def zones(self) -> ZoneSet | None:
+        """The loaded zones or None if they have not been loaded yet."""
+        return self._zones
+
+    @callback
+    def async_acquire(self) -> None:
+        """Register a user of the store."""
+        self._references += 1
+        self._async_update_watch()
+        if self._unsub_refresh is None:
+            self._async_schedule_refresh()
+
+    @callback
+    def async_release(self) -> None:
+        """Unregister a user of the store, dropping the zones when it was the last."""
+        self._references = max(self._references - 1, 0)
+        if self._references == 0:
+            if self._unsub_watch is not None:
+                self._unsub_watch()
+                self._unsub_watch = None
+            self._async_cancel_refresh()
+
+            self._zones = None
+            self._sources = {}
+            self._file_stats = None
+            self._repository = None
+            self._unwritten = None
+
+            # the changes made to the zones must still end up in the file
+            if self._writer is not None and self._writer.pending:
+                self._hass.async_create_task(self.async_flush())
+
+    @callback
+    def async_add_listener(self, listener: ZonesListener) -> Callable[[], None]:
+        """Register a listener that is called with the zones after every reload.
+
+        Args:
+            listener: The coroutine function to call with the new zones and the
+                zones that changed, None if those are not known.
+
+        Returns:
+            A callable that removes the listener.
+
+        """
+        self._listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return remove_listener
+
+    @callback
+    def async_update_config(
+        self,
+        uris: list[str],
+        prioritize: bool,
+        index: str = INDEX_STRTREE,
+        refresh_interval: timedelta = timedelta(0),
+        collect_metrics: bool = False,
+    ) -> None:
+        """Change the sources of the zones. This takes effect on the next reload."""
+        self._uris = uris
+        self._prioritize = prioritize
+        self._index = index
+        if not collect_metrics:
+            self._metrics = None
+        elif self._metrics is None:
+            self._metrics = Metrics()
+
+        if self._references:
+            self._async_update_watch()
+        if refresh_interval != self._refresh_interval:
+            self._refresh_interval = refresh_interval
+            self._refresh_failures = 0
+            if self._references:
+                self._async_schedule_refresh()
+
+    async def async_get_zones(self) -> ZoneSet:
+        """Get the zones, loading them if they have not been loaded yet.
+
+        Entities added at the same time wait for the same load, so the files
+        are only fetched and parsed once.
+        """
+        if self._zones is None:
+            async with self._lock:
+                if self._zones is None:
+                    return await self._async_load()
+        return self._zones
+
+    async def async_reload(self) -> ZoneSet:
+        """Reload the zones and pass them to all the listeners.
+
+        A reload requested for several entities at once, like the reload_zones
+        action targeting all of them, is only performed a single time.
+        """
+        if self._reload_task is None or self._reload_task.done():
+            self._reload_task = self._hass.async_create_task(self._async_reload())
+
+        return await asyncio.shield(self._reload_task)
+
+    async def _async_reload(self) -> ZoneSet:
+        """Load the zones and notify the listeners."""
+        async with self._lock:
+            # write the pending changes first, the file might also have been
+            # changed outside of the repository.
+            await self.async_flush()
+
+            # the repository is only read again when the file really changed
+            uri = self._uris[0] if self._editable and self._uris else None
+            source = self._sources.get(uri)
+            previous = self._zones
+            zones = await self._async_load()
+            if self._sources.get(uri) is not source or source is None:
+                self._repository = None
+            _LOGGER.info("Reloaded %d zones from: %s", len(zones), self._uris)
+
+            await self._async_notify(previous, zones)
+            return zones
+
+    async def _async_notify(self, previous: ZoneSet | None, zones: ZoneSet) -> None:
+        """Pass the zones and the changes since the previous zones to the listeners."""
+        changes = None
+        if previous is not None:
+            changes = await self._hass.async_add_executor_job(
+                get_zone_changes, previous, zones
+            )
+            _LOGGER.debug(
+                "Zones added: %s, changed: %s, removed: %s",
+                changes.added,
+                changes.changed,
+                changes.removed,
+            )
+
+        for listener in list(self._listeners):
+            await listener(zones, changes)
+
+    @callback
+    def _async_update_watch(self) -> None:
+        """Check the local zone files for changes, if the store has any."""
+        watch = any(not _is_remote(uri) for uri in self._uris)
+        if watch and self._unsub_watch is None:
+            self._unsub_watch = async_track_time_interval(
+                self._hass, self._async_check_files, WATCH_INTERVAL
+            )
+        elif not watch and self._unsub_watch is not None:
+            self._unsub_watch()
+            self._unsub_watch = None
+
+    async def _async_check_files(self, _now=None) -> None:
+        """Reload the zones when one of the local zone files changed.
+
+        When the reload fails, like for a file that is still being written, the
+        new state of the files is remembered, so the reload is only tried again
+        once the files change again.
+        """
+        if self._file_stats is None or (
+            self._reload_task is not None and not self._reload_task.done()
+        ):
+            return
+
+        stats = await self._async_stat_files()
+        if stats != self._file_stats:
+            _LOGGER.info("Zone files changed, reloading: %s", self._uris)
+            try:
+                await self.async_reload()
+            except (HomeAssistantError, OSError) as err:
+                _LOGGER.warning("Failed to reload the changed zone files: %s", err)
+                if self._file_stats is not None:
+                    self._file_stats = stats
+
+    async def _async_stat_files(self) -> FileStats:
+        """Get the modification time and size of the local zone files."""
+        paths = {
+            uri: await get_data_path(uri, self._hass)
+            for uri in self._uris
+            if not _is_remote(uri)
+        }
+        return await self._hass.async_add_executor_job(_stat_files, paths)
+
+    @callback
+    def _async_schedule_refresh(self) -> None:
+        """Schedule the next check of the remote files.
+
+        After failed checks the delay doubles, up to `MAX_REFRESH_BACKOFF` or
+        the refresh interval if that is longer.
+        """
+        self._async_cancel_refresh()
+        interval = self._refresh_interval.total_seconds()
+        if interval <= 0 or not any(_is_remote(uri) for uri in self._uris):
+            return
+
+        delay = min(
+            interval * 2**self._refresh_failures,
+            max(interval, MAX_REFRESH_BACKOFF.total_seconds()),
+        )
+        delay *= 1 + random.uniform(-REFRESH_JITTER, REFRESH_JITTER)
+        self._unsub_refresh = async_call_later(
+            self._hass, delay, self._async_refresh_remote
+        )
+
+    @callback
+    def _async_cancel_refresh(self) -> None:
+        """Cancel the scheduled check of the remote files."""
+        if self._unsub_refresh is not None:
+            self._unsub_refresh()
+            self._unsub_refresh = None
+
+    async def _async_refresh_remote(self, _now=None) -> None:
+        """Reload the zones when the content of a remote zone file changed.
+
+        The files are fetched with a conditional request, so an unchanged file
+        is usually not even sent again. The hash of the content is compared to
+        the hash of the parsed zones, so the zones are only parsed and indexed
+        again when a file really changed.
+        """
+        self._unsub_refresh = None
+        uris = [uri for uri in self._uris if _is_remote(uri)]
+        try:
+            digests = await asyncio.gather(
+                *(get_source_digest(uri, self._hass, self._metrics) for uri in uris),
+                return_exceptions=True,
+            )
+            failed = False
+            changed = []
+            for uri, digest in zip(uris, digests):
+                if isinstance(digest, BaseException):
+                    _LOGGER.warning("Failed to refresh zones from %s: %s", uri, digest)
+                    failed = True
+                elif uri not in self._sources or self._sources[uri].digest != digest:
+                    changed.append(uri)
+
+            if changed and self._zones is not None:
+                _LOGGER.info("Remote zone files changed, reloading: %s", changed)
+                await self.async_reload()
+            else:
+                _LOGGER.debug("Remote zone files did not change: %s", uris)
+        except (HomeAssistantError, OSError) as err:
+            _LOGGER.warning("Failed to reload the refreshed zones: %s", err)
+            failed = True
+
+        self._refresh_failures = self._refresh_failures + 1 if failed else 0
+        if self._references:
+            self._async_schedule_refresh()
+
+    async def async_get_repository(self) -> ZoneRepository:
+        """Get the repository of the zone file, reading it on first use.
+
+        Raises:
+            ValueError: If the store is not editable.
+
+        """
+        if not self._editable or not self._uris:
+            raise ValueError("The zones of this store are not editable")
+
+        if self._repository is None:
+            # the changes of a dropped repository might not be written yet
+            await self.async_flush()
+            path = await get_data_path(self._uris[0], self._hass)
+            repository = await self._hass.async_add_executor_job(
+                ZoneRepository.from_file, path
+            )
+
+            # another call might have read the file at the same time
+            if self._repository is None:
+                self._repository = repository
+            if self._writer is None:
+                self._writer = ZoneFileWriter(
+                    self._hass, path, self._async_file_written
+                )
+        return self._repository
+
+    async def async_save_repository(self) -> ZoneSet:
+        """Apply the changes made to the repository to the zones.
+
+        The zones are built from the geometries kept by the repository, so the
+        file is not parsed again, and the listeners get them right away. The
+        file is written after a short delay, so a burst of changes is written
+        only once.
+
+        Returns:
+            The new zones.
+
+        """
+        async with self._lock:
+            repository = await self.async_get_repository()
+            features, geometries = repository.snapshot()
+
+            previous = self._zones
+            source, zones = await self._hass.async_add_executor_job(
+                build_zones, features, geometries, self._index, previous
+            )
+
+            # the file is outdated until the writer has written the features
+            self._sources.pop(self._uris[0], None)
+            self._unwritten = features, source
+            self._writer.async_schedule(features)
+            self._zones = zones
+
+            _LOGGER.debug("Updated %d zones of %s", len(zones), self._uris[0])
+            await self._async_notify(previous, zones)
+            return zones
+
+    async def async_flush(self) -> None:
+        """Write the changes made to the zones that have not been written yet."""
+        if self._writer is not None:
+            await self._writer.async_flush()
+
+    @callback
+    def _async_file_written(
+        self, features: list[dict], digest: str, stat: os.stat_result
+    ) -> None:
+        """Remember the zones of the written file, so it is not parsed again.
+
+        When the zones were built from exactly the written features, the stat
+        of the written file is remembered as well, so the watcher does not take
+        the write for a change made outside of the store. Otherwise the files
+        are checked right away, unless newer features are still to be written.
+        """
+        if self._unwritten is not None and self._unwritten[0] is features:
+            uri = self._uris[0]
+            self._sources[uri] = self._unwritten[1]._replace(digest=digest)
+            self._unwritten = None
+            if self._file_stats is not None:
+                self._file_stats = self._file_stats | {
+                    uri: (stat.st_mtime_ns, stat.st_size)
+                }
+        elif not self._writer.pending:
+            self._hass.async_create_task(self._async_check_files())
+
+    async def _async_load(self) -> ZoneSet:
+        """Load the zones from their sources, holding the lock of the store.
+
+        The load runs in its own task, so a caller that is cancelled does not
+        leave the zones half loaded. Files whose content did not change since
+        the previous load are not parsed again.
+        """
+        if self._load_task is None or self._load_task.done():
+            self._load_task = self._hass.async_create_task(self._async_load_zones())
+
+        self._zones = await asyncio.shield(self._load_task)
+        return self._zones
+
+    async def _async_load_zones(self) -> ZoneSet:
+        """Load the zones, remembering the state of the files they came from."""
+        file_stats = await self._async_stat_files()
+        zones = await get_zones(
+            self._uris,
+            self._hass,
+            self._prioritize,
+            self._sources,
+            self._index,
+            self._zones,
+            self._metrics,
+        )
+        self._file_stats = file_stats
+        return zones
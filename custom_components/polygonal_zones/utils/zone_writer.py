@@ -0,0 +1,133 @@
+"""Background writing of zone files for the polygonal zones integration."""
+
+import asyncio
+from collections.abc import Callable
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .general import write_file_atomic
+
+_LOGGER = logging.getLogger(__name__)
+
+# The time in seconds changes are collected before the file is written.
+WRITE_DELAY = 2
+
+WrittenCallback = Callable[[list[dict], str, os.stat_result], None]
+
+
+def _write_features(path: Path, features: list[dict]) -> tuple[str, os.stat_result]:
+    """Write the features as a FeatureCollection to a file.
+
+    This is blocking, so run it in the executor.
+
+    Returns:
+        The sha256 hash of the written content and the stat of the written file.
+
+    """
+    content = json.dumps({"type": "FeatureCollection", "features": features})
+    write_file_atomic(path, content)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest(), os.stat(path)
+
+
+class ZoneFileWriter:
+    """Writes the features of a zone file after a short delay.
+
+    Every change schedules the complete list of features. The file is written
+    once the changes stop coming in for `WRITE_DELAY` seconds, so a burst of
+    changes results in a single write of the latest features. The features
+    are serialized and written in the executor and the file is replaced
+    atomically, so it is never left half written.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        path: Path,
+        on_written: WrittenCallback | None = None,
+        delay: float = WRITE_DELAY,
+    ):
+        """Initialize the writer.
+
+        Args:
+            hass: The homeassistant instance.
+            path: The path of the zone file.
+            on_written: Called with the written features, the sha256 hash of
+                the written content and the stat of the written file after
+                every write.
+            delay: The time in seconds to wait for more changes.
+
+        """
+        self._hass = hass
+        self._path = path
+        self._on_written = on_written
+        self._delay = delay
+
+        self._features: list[dict] | None = None
+        self._unsub_timer: Callable[[], None] | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def path(self) -> Path:
+        """The path of the zone file."""
+        return self._path
+
+    @property
+    def pending(self) -> bool:
+        """Are there features that have not been written yet."""
+        return self._features is not None
+
+    @callback
+    def async_schedule(self, features: list[dict]) -> None:
+        """Schedule the features to be written, replacing earlier features.
+
+        Args:
+            features: The complete list of features of the file. The list must
+                not be changed afterwards.
+
+        """
+        self._features = features
+
+        # every change postpones the write, up to the end of the burst
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+        self._unsub_timer = async_call_later(
+            self._hass, self._delay, self._async_write_later
+        )
+
+    @callback
+    def _async_write_later(self, _now) -> None:
+        self._unsub_timer = None
+        self._hass.async_create_task(self.async_flush())
+
+    async def async_flush(self) -> None:
+        """Write the scheduled features right away, if there are any."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+        async with self._lock:
+            features, self._features = self._features, None
+            if features is None:
+                return
+
+            try:
+                digest, stat = await self._hass.async_add_executor_job(
+                    _write_features, self._path, features
+                )
+            except OSError:
+                _LOGGER.exception("Failed to write the zones to %s", self._path)
+
+                # keep the features for the next write, unless they are outdated
+                if self._features is None:
+                    self._features = features
+                return
+
+        _LOGGER.debug("Wrote %d zones to %s", len(features), self._path)
+        if self._on_written is not None:
+            self._on_written(features, digest, stat)
@@ -1,15 +1,64 @@
 """Zone related utility functions for polygonal zones integration."""
 
-import json
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+import time
+from typing import NamedTuple
 
 import numpy as np
-import pandas as pd
-from shapely.geometry import Point, shape
-from shapely.geometry.polygon import Polygon
+import shapely
+from shapely.geometry import shape
+from shapely.geometry.base import BaseGeometry
 
 from homeassistant.core import HomeAssistant
 
-from .general import load_data
+from .compiled_zones import get_compiled_path, read_compiled, write_compiled
+from .errors import ZoneLoadError
+from .general import get_data_path
+from .geojson_stream import iter_features
+from .metrics import Metrics
+from .zone_set import EARTH_RADIUS, INDEX_STRTREE, ZoneSet, to_local_frame
+
+_LOGGER = logging.getLogger(__name__)
+
+# The maximum amount of zone sources that are loaded at the same time.
+MAX_CONCURRENT_LOADS = 4
+# The time in seconds a single zone source may take to load.
+LOAD_TIMEOUT = 30
+# The highest latitude in degrees used to widen the accuracy boxes in longitude.
+MAX_BOX_LATITUDE = 89.9
+# The distance in meters beyond the accuracy of a fix that is searched for
+# zones to find its safe area, see `get_locations_zone_and_safe_area`.
+SAFE_AREA_MARGIN = 100
+
+
+def haversine_radians(
+    lat1: np.array, lon1: np.array, lat2: np.array, lon2: np.array
+) -> np.array:
+    """Calculate the elementwise Haversine distances between two sets of points.
+
+    The arguments are broadcast against each other, so any of them can be a
+    single value or an array.
+
+    Args:
+        lat1: The latitudes of the first points (in radians)
+        lon1: The longitudes of the first points (in radians)
+        lat2: The latitudes of the second points (in radians)
+        lon2: The longitudes of the second points (in radians)
+
+    Returns:
+        Array of distances in meters
+
+    """
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    return EARTH_RADIUS * c
 
 
 def haversine_distances(point: np.array, coordinates: np.array) -> np.array:
@@ -20,100 +69,538 @@ def haversine_distances(point: np.array, coordinates: np.array) -> np.array:
         coordinates: NumPy array of shape (n, 2) containing latitudes and longitudes of multiple points (in degrees)
 
     Returns:
-        Array of distances in kilometers
+        Array of distances in meters
 
     """
-    R = 6371000  # Radius of the earth in meters
-
     lat1, lon1 = np.radians(point)
     lats2, lons2 = np.radians(coordinates).T
 
-    dlat = lats2 - lat1
-    dlon = lons2 - lon1
+    return haversine_radians(lat1, lon1, lats2, lons2)
+
+
+def get_distances_to_exteriors(
+    zones: ZoneSet, zone_idx: np.ndarray, lats: np.ndarray, lons: np.ndarray
+) -> np.ndarray:
+    """Get the distances between points and the closest edge of the exterior of zones.
+
+    All the (point, zone) pairs are handled at once. The edges of the zones of
+    all pairs are gathered into a single array and the distance from every
+    edge to the point of its pair is computed in the local frame of the zone.
+
+    Args:
+        zones: The loaded zones.
+        zone_idx: The index of the zone of every pair.
+        lats: The latitude of the point of every pair (in radians)
+        lons: The longitude of the point of every pair (in radians)
+
+    Returns:
+        The distance of every pair in meters.
+
+    """
+    starts = zones.edge_offsets[zone_idx]
+    counts = zones.edge_offsets[zone_idx + 1] - starts
+    pair_starts = np.cumsum(counts) - counts
+    edge_idx = np.repeat(starts - pair_starts, counts) + np.arange(counts.sum())
+    edge_pairs = np.repeat(np.arange(len(zone_idx)), counts)
+
+    # the points relative to the start of the edges
+    x, y = to_local_frame(lats, lons, zones.centroids[zone_idx])
+    px = x[edge_pairs] - zones.edge_starts[edge_idx, 0]
+    py = y[edge_pairs] - zones.edge_starts[edge_idx, 1]
+    dx = zones.edge_vectors[edge_idx, 0]
+    dy = zones.edge_vectors[edge_idx, 1]
+
+    # the position of the closest point along the edge, clipped to the edge.
+    length = dx * dx + dy * dy
+    t = np.clip((px * dx + py * dy) / np.where(length > 0, length, 1), 0, 1)
+    edge_distances = np.hypot(px - t * dx, py - t * dy)
+
+    distances = np.full(len(zone_idx), np.inf)
+    np.minimum.at(distances, edge_pairs, edge_distances)
+    return distances
+
+
+def get_distance_to_centroid(
+    zones: ZoneSet, zone_idx: int, lat: float, lon: float
+) -> float:
+    """Get the haversine distance between a point and the centroid of a zone.
+
+    Args:
+        zones: The loaded zones.
+        zone_idx: The index of the zone.
+        lat: The latitude of the point (in radians)
+        lon: The longitude of the point (in radians)
+
+    Returns:
+        The distance in meters.
+
+    """
+    centroid_lat, centroid_lon = zones.centroids[zone_idx]
+    return float(haversine_radians(lat, lon, centroid_lat, centroid_lon))
+
+
+class SourceZones(NamedTuple):
+    """The zones parsed from a single source.
+
+    The priorities are None for zones that do not define one, those get the
+    priority of the source when the zones are combined into a ZoneSet.
+    """
+
+    digest: str
+    names: list[str]
+    priorities: list[float | None]
+    geometries: list[BaseGeometry]
 
-    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lats2) * np.sin(dlon / 2) ** 2
-    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
 
-    return R * c
+def _hash_file(path: Path) -> str:
+    """Get the sha256 hash of the content of a file."""
+    with open(path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
 
 
-def get_distance_to_exterior_points(polygon: Polygon, point: Point) -> float:
-    """Get the haversine distance between a point and the closest exterior point of a polygon.
+def _parse_source(
+    path: Path, cached: SourceZones | None, compiled_path: Path | None = None
+) -> SourceZones:
+    """Parse the zones in a GeoJSON file.
+
+    The features are read from the file one at a time, so only the parsed
+    zones are held in memory and not the complete document. This is
+    blocking, so run it in the executor.
 
     Args:
-        polygon: A shapely Polygon object
-        point: A shapely Point object
+        path: The path of the GeoJSON file.
+        cached: The zones previously parsed from the same source, if any.
+        compiled_path: The directory of the compiled zones of the source, see
+            `compiled_zones`. When they match the content of the file they are
+            used instead of parsing it, otherwise they are written after parsing.
 
     Returns:
-        The distance in kilometers.
+        The parsed zones. This is `cached` if the content did not change.
 
     """
-    polygon_points = np.array(polygon.exterior.coords)
-    point_coords = np.array([point.x, point.y])
-    distances = haversine_distances(point_coords, polygon_points)
-    return min(distances)
+    digest = _hash_file(path)
+    if cached is not None and cached.digest == digest:
+        return cached
+
+    if compiled_path is not None:
+        compiled = read_compiled(compiled_path, digest)
+        if compiled is not None:
+            return SourceZones(digest, *compiled)
+
+    names = []
+    priorities = []
+    geometries = []
+
+    # parse the geojson file. We only want the relevant information.
+    with open(path, encoding="utf-8") as file:
+        for feature in iter_features(file):
+            properties = feature["properties"]
+            names.append(properties["name"])
+            priorities.append(properties.get("priority"))
+            geometries.append(shape(feature["geometry"]))
 
+    if compiled_path is not None:
+        try:
+            write_compiled(compiled_path, digest, names, priorities, geometries)
+        except (OSError, TypeError, ValueError) as err:
+            _LOGGER.warning("Failed to compile the zones of %s: %s", path, err)
 
-def get_distance_to_centroid(polygon: Polygon, point: Point) -> float:
-    """Get the haversine distance between a point and the centroid of a polygon.
+    return SourceZones(digest, names, priorities, geometries)
+
+
+async def _load_source(
+    uri: str,
+    hass: HomeAssistant,
+    semaphore: asyncio.Semaphore,
+    cached: SourceZones | None,
+    metrics: Metrics | None = None,
+) -> SourceZones:
+    """Load and parse a single GeoJSON source.
 
     Args:
-        polygon: A shapely Polygon object
-        point: A shapely Point object
+        uri: The link/path to the GeoJSON file.
+        hass: The homeassistant instance.
+        semaphore: Limits the amount of sources loaded at the same time.
+        cached: The zones previously parsed from this source, if any.
+        metrics: The metrics to record the download and parsing in.
 
     Returns:
-        The distance in kilometers.
+        The parsed zones. This is `cached` if the content did not change.
 
     """
-    polygon_centroid = np.array(polygon.centroid.xy).reshape(1, -1)[0]
-    point = np.array([point.x, point.y])
+    async with semaphore, asyncio.timeout(LOAD_TIMEOUT):
+        path = await get_data_path(uri, hass, metrics)
 
-    return haversine_distances(point, polygon_centroid)
+    start = time.perf_counter()
+    source = await hass.async_add_executor_job(
+        _parse_source, path, cached, get_compiled_path(uri, hass)
+    )
+    duration = time.perf_counter() - start
+    if source is not cached:
+        _LOGGER.debug(
+            "Loaded %d zones from %s in %.1f ms",
+            len(source.names),
+            uri,
+            duration * 1000,
+        )
+
+    if metrics is not None:
+        if source is cached:
+            metrics.increment("sources_unchanged")
+        else:
+            metrics.increment("sources_parsed")
+            metrics.observe("source_parse", duration)
+    return source
+
+
+async def get_source_digest(
+    uri: str, hass: HomeAssistant, metrics: Metrics | None = None
+) -> str:
+    """Fetch a source and get the sha256 hash of its content, without parsing it.
+
+    Args:
+        uri: The link/path to the GeoJSON file.
+        hass: The homeassistant instance.
+        metrics: The metrics to record the download in, if collected.
+
+    Returns:
+        The hash, equal to the digest of the parsed zones of the same content.
+
+    """
+    async with asyncio.timeout(LOAD_TIMEOUT):
+        path = await get_data_path(uri, hass, metrics)
+    return await hass.async_add_executor_job(_hash_file, path)
 
 
 async def get_zones(
-    uris: list[str], hass: HomeAssistant, prioritize: bool
-) -> pd.DataFrame:
-    """Get the zones from the geojson file.
+    uris: list[str],
+    hass: HomeAssistant,
+    prioritize: bool,
+    sources: dict[str, SourceZones] | None = None,
+    index: str = INDEX_STRTREE,
+    previous: ZoneSet | None = None,
+    metrics: Metrics | None = None,
+) -> ZoneSet:
+    """Get the zones from the geojson files.
+
+    The files are loaded concurrently. A file that fails to load keeps the
+    zones previously parsed from it in `sources`, so a failed reload does not
+    drop them. A file that was never loaded is logged and skipped, the other
+    files keep the priority of their position in `uris`.
 
     Args:
-        uris: The URL to the geojson file.
+        uris: The URLs to the geojson files.
         hass: The homeassistant instance.
         prioritize: boolean if we want to prioritize the zones in order.
+        sources: The zones parsed by a previous call, by uri. Files with the
+            same content are not parsed again. It is updated with the newly
+            parsed zones.
+        index: The index used to find the candidate zones of the lookups, see
+            `ZoneSet`.
+        previous: The zones loaded before, the unchanged zones reuse their
+            derived data.
+        metrics: The metrics to record the load in, if collected.
 
     Returns:
-        A pandas DataFrame containing the zones.
+        A ZoneSet containing the zones.
+
+    Raises:
+        ZoneLoadError: If none of the files could be loaded.
 
     """
-    zones = []
+    if sources is None:
+        sources = {}
+
+    start = time.perf_counter()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_LOADS)
+    loaded = await asyncio.gather(
+        *(
+            _load_source(uri, hass, semaphore, sources.get(uri), metrics)
+            for uri in uris
+        ),
+        return_exceptions=True,
+    )
 
-    for idx, uri in enumerate(uris):
-        data = await load_data(uri, hass)
-        data = json.loads(data)
+    names = []
+    priorities = []
+    geometries = []
+    failed = []
+
+    for idx, (uri, source) in enumerate(zip(uris, loaded)):
+        if isinstance(source, BaseException):
+            if uri not in sources:
+                _LOGGER.warning("Failed to load zones from %s: %r", uri, source)
+                failed.append(uri)
+                continue
+
+            _LOGGER.warning(
+                "Failed to load zones from %s, keeping the previous zones: %r",
+                uri,
+                source,
+            )
+            source = sources[uri]
+
+        sources[uri] = source
+        default_priority = idx if prioritize else 0
+        names.extend(source.names)
+        priorities.extend(
+            default_priority if priority is None else priority
+            for priority in source.priorities
+        )
+        geometries.extend(source.geometries)
+
+    if failed and len(failed) == len(uris):
+        raise ZoneLoadError(f"Failed to load zones from: {', '.join(failed)}")
+
+    # forget the sources that are no longer used
+    for uri in set(sources) - set(uris):
+        del sources[uri]
+
+    # preparing and indexing the geometries is slow for large sets as well.
+    zones = await hass.async_add_executor_job(
+        ZoneSet, names, priorities, geometries, index, previous
+    )
+    if metrics is not None:
+        metrics.increment("zone_loads")
+        metrics.observe("zone_load", time.perf_counter() - start)
+    return zones
 
-        # parse the geojson file into a pandas DataFrame.
-        # We only want the relevant information.
-        for feature in data["features"]:
-            if "priority" in feature:
-                priority = data["priority"]
-            else:
-                priority = idx if prioritize else 0
 
-            geometry = shape(feature["geometry"])
-            properties = feature["properties"]
-            zones.append(
-                {
-                    "geometry": geometry,
-                    "priority": priority,
-                    **properties,
-                }
+def get_accuracy_bounds(lats: np.array, lons: np.array, accs: np.array) -> np.ndarray:
+    """Get the (lon, lat) bounds that contain the accuracy circles of GPS fixes.
+
+    The bounds are only used to select the candidate zones from the index, so
+    they are widened towards the pole to always contain the complete circle.
+
+    Args:
+        lats: The latitudes of the GPS coordinates (in degrees)
+        lons: The longitudes of the GPS coordinates (in degrees)
+        accs: The accuracies of the GPS coordinates in meters.
+
+    Returns:
+        The (minx, miny, maxx, maxy) of every fix, in the last axis.
+
+    """
+    dlat = np.degrees(accs / EARTH_RADIUS)
+    cos_lat = np.cos(np.radians(np.minimum(np.abs(lats) + dlat, MAX_BOX_LATITUDE)))
+    dlon = np.minimum(np.degrees(accs / (EARTH_RADIUS * cos_lat)), 180)
+
+    return np.stack([lons - dlon, lats - dlat, lons + dlon, lats + dlat], axis=-1)
+
+
+def _test_zones(
+    zones: ZoneSet,
+    zone_idx: np.ndarray,
+    lats: np.ndarray,
+    lons: np.ndarray,
+    accs: np.ndarray,
+    boundaries: bool = False,
+) -> tuple[np.ndarray, np.ndarray | None]:
+    """Check if points are within their accuracy of zones, see `get_zones_within`.
+
+    Args:
+        zones: The loaded zones.
+        zone_idx: The index of the zone of every pair.
+        lats: The latitude of the point of every pair (in radians)
+        lons: The longitude of the point of every pair (in radians)
+        accs: The accuracy of the point of every pair in meters.
+        boundaries: If the distances to the boundaries of the zones are needed.
+
+    Returns:
+        Whether the distance between the point and the zone is at most the
+        accuracy, for every pair. If `boundaries` is set also a lower bound of
+        the distance in meters from the point to the boundary of the zone,
+        negative for the points inside the zone, or None otherwise.
+
+    """
+    x, y = to_local_frame(lats, lons, zones.centroids[zone_idx])
+    inside = shapely.contains_xy(zones.inner[zone_idx], x, y)
+    within = inside.copy()
+
+    rest = np.flatnonzero(~inside)
+    points = shapely.points(x[rest], y[rest])
+    distances = shapely.distance(zones.outer[zone_idx[rest]], points)
+    near = distances <= accs[rest]
+
+    # the zones without shells are their own outer shell, so the distance to
+    # it was exact already.
+    band = near & zones.shelled[zone_idx[rest]]
+    within[rest[near & ~band]] = True
+
+    distances[band] = shapely.distance(
+        zones.projected[zone_idx[rest[band]]], points[band]
+    )
+    within[rest[band]] = distances[band] <= accs[rest[band]]
+    if not boundaries:
+        return within, None
+
+    # the outer shell contains the zone, so the distance to it is a lower
+    # bound of the distance to the zone. The boundary of the zone lies outside
+    # of the inner shell, so for the points inside the inner shell the
+    # distance to its boundary is a lower bound as well. The points in the
+    # band that are inside the zone get 0.
+    signed = np.empty(len(zone_idx))
+    signed[rest] = distances
+    inside = np.flatnonzero(inside)
+    signed[inside] = -shapely.distance(
+        shapely.boundary(zones.inner[zone_idx[inside]]),
+        shapely.points(x[inside], y[inside]),
+    )
+    return within, signed
+
+
+def get_zones_within(
+    zones: ZoneSet,
+    zone_idx: np.ndarray,
+    lats: np.ndarray,
+    lons: np.ndarray,
+    accs: np.ndarray,
+) -> np.ndarray:
+    """Check if points are within their accuracy of zones.
+
+    The shells of the zones decide most pairs: a point inside the inner shell
+    is inside the zone, and a point further than its accuracy from the outer
+    shell is further from the zone. Only the points in the band between the
+    shells are tested against the complete zone.
+
+    Args:
+        zones: The loaded zones.
+        zone_idx: The index of the zone of every pair.
+        lats: The latitude of the point of every pair (in radians)
+        lons: The longitude of the point of every pair (in radians)
+        accs: The accuracy of the point of every pair in meters.
+
+    Returns:
+        Whether the distance between the point and the zone is at most the
+        accuracy, for every pair.
+
+    """
+    return _test_zones(zones, zone_idx, lats, lons, accs)[0]
+
+
+def _select_zone(
+    zones: ZoneSet, candidates: np.ndarray, lat: float, lon: float
+) -> int | None:
+    """Select the zone of a GPS fix from the zones within its accuracy.
+
+    Args:
+        zones: The loaded zones.
+        candidates: The sorted indexes of the zones within the accuracy.
+        lat: The latitude of the GPS coordinates (in radians)
+        lon: The longitude of the GPS coordinates (in radians)
+
+    Returns:
+        The index of the closest zone or None if the fix is in no zone.
+
+    """
+    if candidates.size <= 1:
+        return int(candidates[0]) if candidates.size else None
+
+    # filter to the lowest priority zones
+    priorities = zones.priorities[candidates]
+    candidates = candidates[priorities == priorities.min()]
+
+    # pick the zone with the closest exterior edge, on equal distance the
+    # first defined zone.
+    distances = get_distances_to_exteriors(
+        zones,
+        candidates,
+        np.full(candidates.size, lat),
+        np.full(candidates.size, lon),
+    )
+    return int(candidates[np.argmin(distances)])
+
+
+def _lookup(
+    lat: float,
+    lon: float,
+    acc: float,
+    zones: ZoneSet,
+    metrics: Metrics | None,
+    margin: float | None,
+) -> tuple[dict | None, float | None, int | None]:
+    """Find the zone of a GPS fix and, if a margin is given, its safe area.
+
+    Args:
+        lat: The latitude of the GPS coordinates.
+        lon: The longitude of the GPS coordinates.
+        acc: The accuracy of the GPS coordinates in meters.
+        zones: The loaded zones.
+        metrics: The metrics to record the lookup in, if collected.
+        margin: The distance in meters beyond the accuracy that is searched
+            for zones, None to not find the safe area.
+
+    Returns:
+        The closest zone or None, and the radius and zone of the safe area as
+        described by `get_locations_zone_and_safe_area`, or None and None
+        without a margin.
+
+    """
+    if metrics is not None:
+        start = time.perf_counter()
+
+    zone_idx = None
+    candidates = ()
+    radius, safe_idx = (np.inf, None) if margin is not None else (None, None)
+    if len(zones) > 0:
+        # Get the zones we might be in. The index only returns the zones near
+        # the box around the accuracy circle, those are then tested exactly in
+        # meters in the frame of the zone. The grid can tell the zone directly
+        # when the box only covers cells inside a single zone.
+        search = acc if margin is None else acc + margin
+        bounds = get_accuracy_bounds(lat, lon, search)
+        found = None if zones.grid is None else zones.grid.query(*bounds)
+        if found is None:
+            found = np.sort(zones.tree.query(shapely.box(*bounds))), None
+        candidates, zone_idx = found
+        if metrics is not None and zone_idx is not None:
+            metrics.increment("grid_interior_hits")
+
+        lat, lon = np.radians(lat), np.radians(lon)
+        if zone_idx is not None:
+            # the whole searched box is inside the zone
+            radius, safe_idx = search, zone_idx
+        else:
+            within, signed = _test_zones(
+                zones,
+                candidates,
+                np.full(candidates.size, lat),
+                np.full(candidates.size, lon),
+                np.full(candidates.size, acc),
+                margin is not None,
             )
+            zone_idx = _select_zone(zones, candidates[within], lat, lon)
+
+            if margin is not None:
+                # the zones that were not found are further than the search
+                containing = candidates[signed < 0]
+                radius = min(search, float(np.abs(signed).min(initial=np.inf)))
+                if containing.size > 1:
+                    radius = 0.0
+                elif containing.size == 1:
+                    safe_idx = int(containing[0])
+
+    # if we have 0 possible zones we will return None.
+    zone = None
+    if zone_idx is not None:
+        zone = {
+            "name": zones.names[zone_idx],
+            "distance_to_centroid": get_distance_to_centroid(zones, zone_idx, lat, lon),
+        }
 
-    return pd.DataFrame(zones)
+    if metrics is not None:
+        metrics.increment("lookups")
+        metrics.increment("lookup_candidates", len(candidates))
+        metrics.observe("lookup", time.perf_counter() - start)
+    return zone, radius, safe_idx
 
 
 def get_locations_zone(
-    lat: float, lon: float, acc: float, zones: pd.DataFrame
+    lat: float,
+    lon: float,
+    acc: float,
+    zones: ZoneSet,
+    metrics: Metrics | None = None,
 ) -> dict | None:
     """Determine the closest zone to the given GPS coordinates.
 
@@ -121,50 +608,162 @@ def get_locations_zone(
         lat: The latitude of the GPS coordinates.
         lon: The longitude of the GPS coordinates.
         acc: The accuracy of the GPS coordinates in meters.
-        zones: A pandas DataFrame containing the zones, with a "geometry" column
-            of Polygon objects.
+        zones: The loaded zones. Their index is used to select the candidate
+            zones before the exact test in the local frames of the zones.
+        metrics: The metrics to record the lookup in, if collected.
 
     Returns:
         The closest zone if found, otherwise `None`.
 
     """
-    if len(zones) == 0:
-        return None
+    return _lookup(lat, lon, acc, zones, metrics, None)[0]
+
+
+def get_locations_zone_and_safe_area(
+    lat: float,
+    lon: float,
+    acc: float,
+    zones: ZoneSet,
+    metrics: Metrics | None = None,
+) -> tuple[dict | None, float, int | None]:
+    """Determine the closest zone to GPS coordinates and the safe area around them.
+
+    The safe area is the circle around the point in which every fix resolves
+    to the same zone. Every zone either contains this circle or does not touch
+    it. A fix whose distance to the point plus its accuracy is smaller than the
+    radius therefore only intersects the zones that contain the point. When
+    that is at most one zone, the fix resolves to that zone or to no zone
+    without searching.
+
+    The radius comes from the same search as the zone: the index is searched
+    `SAFE_AREA_MARGIN` beyond the accuracy, and the distances to the boundaries
+    of the candidates are bounded by the tests that decide the zone. It is at
+    most the accuracy plus the margin.
 
-    gps_point = Point(lon, lat)
-    buffer = gps_point.buffer(acc / 111320)
+    Args:
+        lat: The latitude of the GPS coordinates.
+        lon: The longitude of the GPS coordinates.
+        acc: The accuracy of the GPS coordinates in meters.
+        zones: The loaded zones.
+        metrics: The metrics to record the lookup in, if collected.
 
-    # Get the zones we might be in
-    posible_zones = zones[buffer.intersects(zones["geometry"])]
+    Returns:
+        The closest zone if found, otherwise `None`, the radius of the safe
+        area in meters and the index of the zone containing the point or None
+        if no zone contains it. The radius is 0 when multiple zones contain the
+        point, as then the closest zone depends on the position.
 
-    # if we have 1 or 0 possible zones we will return.
-    if posible_zones.empty:
-        return None
+    """
+    return _lookup(lat, lon, acc, zones, metrics, SAFE_AREA_MARGIN)
 
-    if len(posible_zones) == 1:
-        zone = posible_zones.iloc[0]
-        centroid_distance = get_distance_to_centroid(zone["geometry"], gps_point)
-        return {
-            "name": zone["name"],
-            "distance_to_centroid": centroid_distance,
-        }
 
-    # filter to the lowest priority zones
-    posible_zones = posible_zones[
-        posible_zones["priority"] == posible_zones["priority"].min()
-    ]
+def get_locations_zones(
+    lats: np.array, lons: np.array, accs: np.array, zones: ZoneSet
+) -> list[dict | None]:
+    """Determine the closest zone for many GPS coordinates at once.
 
-    # get the distances to the potential zones using the uclidean distance to the cetnroid
-    distances = posible_zones["geometry"].apply(
-        lambda x: get_distance_to_exterior_points(x, gps_point)
+    This gives the same result as calling `get_locations_zone` for every
+    coordinate, but all the coordinates are handled together using the
+    vectorized shapely and NumPy functions.
+
+    Args:
+        lats: The latitudes of the GPS coordinates.
+        lons: The longitudes of the GPS coordinates.
+        accs: The accuracies of the GPS coordinates in meters.
+        zones: The loaded zones.
+
+    Returns:
+        A list with the closest zone of every coordinate, `None` if not in a zone.
+
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    accs = np.asarray(accs, dtype=float)
+
+    results: list[dict | None] = [None] * len(lats)
+    if len(zones) == 0 or len(lats) == 0:
+        return results
+
+    # every (point, zone) pair where the box around the accuracy circle of the
+    # point is near the zone. The points the grid places inside a single zone
+    # are in that zone without testing it.
+    bounds = get_accuracy_bounds(lats, lons, accs)
+    if zones.grid is None:
+        point_idx, zone_idx = zones.tree.query(shapely.box(*bounds.T))
+        inside = np.full(len(lats), -1)
+    else:
+        point_idx, zone_idx, inside, handled = zones.grid.query_bulk(bounds)
+        if not handled.all():
+            unhandled = np.flatnonzero(~handled)
+            tree_points, tree_zones = zones.tree.query(
+                shapely.box(*bounds[unhandled].T)
+            )
+            point_idx = np.concatenate([point_idx, unhandled[tree_points]])
+            zone_idx = np.concatenate([zone_idx, tree_zones])
+
+        accepted = inside[point_idx] >= 0
+        point_idx, zone_idx = point_idx[~accepted], zone_idx[~accepted]
+
+    # the remaining pairs where the accuracy circle of the point is within the
+    # accuracy of the zone.
+    lats, lons = np.radians(lats), np.radians(lons)
+    hits = get_zones_within(
+        zones, zone_idx, lats[point_idx], lons[point_idx], accs[point_idx]
+    )
+    point_idx, zone_idx = point_idx[hits], zone_idx[hits]
+
+    inside_points = np.flatnonzero(inside >= 0)
+    point_idx = np.concatenate([point_idx, inside_points])
+    zone_idx = np.concatenate([zone_idx, inside[inside_points]])
+    if point_idx.size == 0:
+        return results
+
+    # only keep the zones with the lowest priority value of each point
+    priorities = zones.priorities[zone_idx]
+    lowest = np.full(len(lats), np.inf)
+    np.minimum.at(lowest, point_idx, priorities)
+    keep = priorities == lowest[point_idx]
+    point_idx, zone_idx = point_idx[keep], zone_idx[keep]
+
+    # the distance from every point to the closest exterior edge of its zones.
+    distances = get_distances_to_exteriors(
+        zones, zone_idx, lats[point_idx], lons[point_idx]
+    )
+
+    # pick the closest zone per point, on equal distance the first defined zone
+    order = np.lexsort((zone_idx, distances, point_idx))
+    point_idx, zone_idx = point_idx[order], zone_idx[order]
+    first = np.ones(len(point_idx), dtype=bool)
+    first[1:] = point_idx[1:] != point_idx[:-1]
+    point_idx, zone_idx = point_idx[first], zone_idx[first]
+
+    centroid_distances = haversine_radians(
+        lats[point_idx],
+        lons[point_idx],
+        zones.centroids[zone_idx, 0],
+        zones.centroids[zone_idx, 1],
     )
 
-    closest_zone_index = distances.idxmin()
+    for point, zone, distance in zip(point_idx, zone_idx, centroid_distances):
+        results[point] = {
+            "name": zones.names[zone],
+            "distance_to_centroid": float(distance),
+        }
+    return results
+
+
+def get_fix_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Get the distance between two GPS fixes.
+
+    Args:
+        lat1: The latitude of the first fix (in degrees)
+        lon1: The longitude of the first fix (in degrees)
+        lat2: The latitude of the second fix (in degrees)
+        lon2: The longitude of the second fix (in degrees)
+
+    Returns:
+        The distance in meters.
 
-    # get the amount of zones that have the same distance
-    zone = zones.loc[closest_zone_index]
-    centroid_distance = get_distance_to_centroid(zone["geometry"], gps_point)
-    return {
-        "name": zone["name"],
-        "distance_to_centroid": centroid_distance,
-    }
+    """
+    lat1, lon1, lat2, lon2 = np.radians([lat1, lon1, lat2, lon2])
+    return float(haversine_radians(lat1, lon1, lat2, lon2))
@@ -0,0 +1 @@
+"""Tests for the polygonal zones integration."""
@@ -0,0 +1,27 @@
+"""Helpers shared by the tests of the polygonal zones integration."""
+
+import json
+from pathlib import Path
+
+
+def square_feature(
+    name, x: float, y: float, size: float = 0.01, priority: int | None = None
+) -> dict:
+    """Get a GeoJSON feature of a square zone with its south west corner at (x, y)."""
+    properties = {"name": name}
+    if priority is not None:
+        properties["priority"] = priority
+    ring = [[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]
+    return {
+        "type": "Feature",
+        "properties": properties,
+        "geometry": {"type": "Polygon", "coordinates": [ring]},
+    }
+
+
+def write_zones(path: Path, features: list[dict]) -> None:
+    """Write the features to a zone file."""
+    path.write_text(
+        json.dumps({"type": "FeatureCollection", "features": features}),
+        encoding="utf-8",
+    )
@@ -0,0 +1,54 @@
+"""Fixtures for the tests of the polygonal zones integration.
+
+The async tests run on the event loop of a bare homeassistant instance, which
+is started in the config directory of the test. No integrations are set up.
+"""
+
+import asyncio
+from collections.abc import Generator
+import inspect
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+
+@pytest.fixture
+def event_loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
+    """Get a new event loop for the test."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def hass(event_loop, tmp_path) -> Generator[HomeAssistant, None, None]:
+    """Get a running homeassistant instance with its config in `tmp_path`."""
+
+    async def async_start() -> HomeAssistant:
+        hass = HomeAssistant(str(tmp_path))
+        await hass.async_start()
+        return hass
+
+    hass = event_loop.run_until_complete(async_start())
+    yield hass
+    event_loop.run_until_complete(hass.async_stop(force=True))
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem: pytest.Function) -> bool | None:
+    """Run the async tests on the event loop of the test."""
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+
+    loop = pyfuncitem.funcargs.get("event_loop")
+    arguments = {
+        name: pyfuncitem.funcargs[name]
+        for name in inspect.signature(pyfuncitem.obj).parameters
+    }
+    coroutine = pyfuncitem.obj(**arguments)
+    if loop is None:
+        asyncio.run(coroutine)
+    else:
+        loop.run_until_complete(coroutine)
+    return True
@@ -0,0 +1,50 @@
+"""Tests of the compiled binary copies of the zone files."""
+
+from pathlib import Path
+
+import shapely
+
+from custom_components.polygonal_zones.utils.compiled_zones import (
+    read_compiled,
+    write_compiled,
+)
+from custom_components.polygonal_zones.utils.zones import _parse_source
+
+from .common import square_feature, write_zones
+
+
+def test_warm_start_matches_cold_start(tmp_path: Path) -> None:
+    """Test that the compiled zones are the zones parsed from the file."""
+    path = tmp_path / "zones.json"
+    write_zones(
+        path,
+        [
+            square_feature("a", 5, 52, priority=2),
+            square_feature(5, 5.1, 52),
+            square_feature("c", 5.2, 52, size=0.02, priority=1),
+        ],
+    )
+    compiled_path = tmp_path / "compiled"
+
+    cold = _parse_source(path, None, compiled_path)
+    warm = read_compiled(compiled_path, cold.digest)
+
+    assert warm is not None
+    names, priorities, geometries = warm
+    assert names == cold.names == ["a", 5, "c"]
+    assert priorities == cold.priorities == [2, None, 1]
+    assert shapely.equals_exact(geometries, cold.geometries, tolerance=0).all()
+    assert _parse_source(path, None, compiled_path) == cold
+
+
+def test_other_contents_are_removed(tmp_path: Path) -> None:
+    """Test that writing a content removes the compiled zones of the others."""
+    geometries = [shapely.box(5, 52, 5.01, 52.01)]
+    (tmp_path / "names.npy").write_bytes(b"layout of an older version")
+
+    write_compiled(tmp_path, "first", ["a"], [None], geometries)
+    write_compiled(tmp_path, "second", ["b"], [1], geometries)
+
+    assert [path.name for path in tmp_path.iterdir()] == ["second"]
+    assert read_compiled(tmp_path, "first") is None
+    assert read_compiled(tmp_path, "second")[:2] == (["b"], [1])
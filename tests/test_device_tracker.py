@@ -0,0 +1,107 @@
+"""Tests of the device trackers of the polygonal zones integration."""
+
+from pathlib import Path
+
+import pytest
+
+from custom_components.polygonal_zones.const import DOMAIN
+from custom_components.polygonal_zones.device_tracker import (
+    PolygonalZoneEntity,
+    UpdateOptions,
+    async_get_zone_uris,
+)
+from custom_components.polygonal_zones.utils.zone_store import ZoneStore
+from homeassistant.config_entries import SOURCE_USER, ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .common import square_feature, write_zones
+
+
+def _config_entry(data: dict) -> ConfigEntry:
+    """Get a config entry of the integration with the data."""
+    return ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain=DOMAIN,
+        title="Polygonal Zones",
+        data=data,
+        source=SOURCE_USER,
+        entry_id="entry",
+    )
+
+
+async def test_zone_uris_skip_empty_uris(hass: HomeAssistant) -> None:
+    """Test that the uris of the entry are used without the empty ones."""
+    entry = _config_entry(
+        {"zone_urls": ["zones.json", "", None, "https://example.com/zones.json"]}
+    )
+
+    assert await async_get_zone_uris(hass, entry) == (
+        ["zones.json", "https://example.com/zones.json"],
+        False,
+    )
+
+
+async def test_zone_uris_of_downloaded_zones(
+    hass: HomeAssistant, tmp_path: Path
+) -> None:
+    """Test that downloaded zones come from the editable local file."""
+    write_zones(tmp_path / "zones.json", [square_feature("a", 5, 52)])
+    entry = _config_entry(
+        {
+            "zone_urls": ["zones.json", ""],
+            "download_zones": True,
+            "prioritize_zone_files": False,
+        }
+    )
+
+    uris = ["/polygonal_zones/entry.json"]
+    assert await async_get_zone_uris(hass, entry) == (uris, True)
+    assert (tmp_path / "polygonal_zones" / "entry.json").exists()
+
+    # the downloaded file is kept when the uris of the entry change
+    entry = _config_entry({**entry.data, "zone_urls": ["https://example.com"]})
+    assert await async_get_zone_uris(hass, entry) == (uris, True)
+
+
+@pytest.mark.parametrize(
+    ("options", "expected"),
+    [
+        # every update is written
+        (UpdateOptions(), [True, True, True, True, True]),
+        # only the changes of zone
+        (UpdateOptions(transition_only=True), [True, False, False, True, True]),
+        # and the movements of more than 50 meters since the last write
+        (
+            UpdateOptions(transition_only=True, min_movement=50),
+            [True, False, True, True, True],
+        ),
+    ],
+)
+async def test_written_states(
+    hass: HomeAssistant, tmp_path: Path, options: UpdateOptions, expected: list
+) -> None:
+    """Test which location updates write the state of the entity."""
+    write_zones(tmp_path / "zones.json", [square_feature("home", 5, 52)])
+    store = ZoneStore(hass, ["zones.json"], False)
+    entity = PolygonalZoneEntity(
+        "device_tracker.phone", "entry", store, "device_tracker.tracker", False, options
+    )
+    entity._zones = await store.async_get_zones()
+
+    fixes = [
+        (52.005, 5.005),
+        # about 11 meters north
+        (52.0051, 5.005),
+        # about 110 meters north of the first fix
+        (52.006, 5.005),
+        (52.02, 5.005),
+        (52.005, 5.005),
+    ]
+    written = []
+    for latitude, longitude in fixes:
+        entity.update_location(latitude, longitude, 0)
+        written.append(entity._should_write_state())
+
+    assert written == expected
+    assert entity.location_name == "home"
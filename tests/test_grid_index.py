@@ -0,0 +1,145 @@
+"""Tests of the indexes used to find the zones of a location."""
+
+import numpy as np
+import pytest
+import shapely
+
+from custom_components.polygonal_zones.utils import grid_index
+from custom_components.polygonal_zones.utils.grid_index import GridIndex
+from custom_components.polygonal_zones.utils.zone_set import (
+    INDEX_GRID,
+    INDEXES,
+    ZoneSet,
+)
+from custom_components.polygonal_zones.utils.zones import (
+    get_distances_to_exteriors,
+    get_locations_zone,
+    get_locations_zones,
+    get_zones_within,
+)
+
+
+def _random_zones(seed: int, count: int = 60) -> tuple[list, np.ndarray, list]:
+    """Get overlapping round zones, some of them detailed enough for shells."""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform((5, 52), (5.05, 52.05), (count, 2))
+    radii = rng.uniform(0.001, 0.008, count)
+    segments = rng.choice([2, 8, 32], count)
+    geometries = [
+        shapely.Point(*center).buffer(radius, quad_segs=int(quad_segs))
+        for center, radius, quad_segs in zip(centers, radii, segments)
+    ]
+    names = [f"zone_{idx}" for idx in range(count)]
+    priorities = rng.integers(0, 3, count)
+    return names, priorities, geometries
+
+
+def _random_fixes(seed: int, count: int = 400):
+    """Get fixes spread over and around the zones."""
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(51.99, 52.06, count)
+    lons = rng.uniform(4.99, 5.06, count)
+    accs = rng.choice([0.0, 5.0, 50.0, 300.0], count)
+    return lats, lons, accs
+
+
+def _brute_force(zones: ZoneSet, lat: float, lon: float, acc: float) -> str | None:
+    """Find the zone of a fix by testing every zone, without an index."""
+    every = np.arange(len(zones))
+    lats = np.full(len(zones), np.radians(lat))
+    lons = np.full(len(zones), np.radians(lon))
+    within = every[get_zones_within(zones, every, lats, lons, np.full(len(zones), acc))]
+    if within.size == 0:
+        return None
+
+    lowest = within[zones.priorities[within] == zones.priorities[within].min()]
+    distances = get_distances_to_exteriors(
+        zones, lowest, lats[: lowest.size], lons[: lowest.size]
+    )
+    return zones.names[lowest[np.argmin(distances)]]
+
+
+@pytest.mark.parametrize("index", INDEXES)
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_lookups_match_brute_force(index: str, seed: int) -> None:
+    """Test that the single and batch lookups find the zone of every fix."""
+    zones = ZoneSet(*_random_zones(seed), index=index)
+    lats, lons, accs = _random_fixes(seed)
+
+    expected = [
+        _brute_force(zones, lat, lon, acc) for lat, lon, acc in zip(lats, lons, accs)
+    ]
+    single = [
+        (zone or {}).get("name")
+        for zone in (
+            get_locations_zone(lat, lon, acc, zones)
+            for lat, lon, acc in zip(lats, lons, accs)
+        )
+    ]
+    batch = [
+        (zone or {}).get("name")
+        for zone in get_locations_zones(lats, lons, accs, zones)
+    ]
+
+    assert any(expected)
+    assert single == expected
+    assert batch == expected
+
+
+def test_grid_candidates_cover_intersecting_zones() -> None:
+    """Test that the cells of a box hold every zone intersecting the box."""
+    _, _, geometries = _random_zones(3)
+    geometries = np.array(geometries, dtype=object)
+    grid = GridIndex(geometries, shapely.bounds(geometries))
+
+    rng = np.random.default_rng(3)
+    for x, y in rng.uniform((5, 52), (5.05, 52.05), (200, 2)):
+        bounds = (x, y, x + 0.0005, y + 0.0005)
+        found = grid.query(*bounds)
+        if found is None:
+            continue
+
+        candidates, inside = found
+        intersecting = np.flatnonzero(
+            shapely.intersects(geometries, shapely.box(*bounds))
+        )
+        assert set(intersecting) <= set(candidates.tolist())
+        if inside is not None:
+            assert intersecting.tolist() == [inside]
+            assert shapely.contains(geometries[inside], shapely.box(*bounds))
+
+
+def test_grid_leaves_geometries_unprepared() -> None:
+    """Test that building the grid does not change the shared geometries."""
+    _, _, geometries = _random_zones(4)
+    geometries = np.array(geometries, dtype=object)
+    shapely.prepare(geometries[:10])
+
+    GridIndex(geometries, shapely.bounds(geometries))
+
+    assert shapely.is_prepared(geometries[:10]).all()
+    assert not shapely.is_prepared(geometries[10:]).any()
+
+
+def test_patched_grid_matches_rebuilt_grid(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that patching the grid after edits gives the grid built from scratch."""
+    names, _, geometries = _random_zones(5, count=200)
+    zones = ZoneSet(names, [0] * len(names), geometries, INDEX_GRID)
+
+    # change, delete and add a few zones, which also moves the other zones
+    _, _, others = _random_zones(6, count=4)
+    geometries[7], geometries[90] = others[0], others[1]
+    del names[0], geometries[0]
+    del names[150], geometries[150]
+    names.insert(20, "added_0")
+    geometries.insert(20, others[2])
+    names.append("added_1")
+    geometries.append(others[3])
+    patched = ZoneSet(names, [0] * len(names), geometries, INDEX_GRID, zones).grid
+
+    monkeypatch.setattr(grid_index, "_get_cell_size", lambda _: zones.grid.cell_size)
+    rebuilt = GridIndex(np.array(geometries, dtype=object), shapely.bounds(geometries))
+
+    assert patched.cell_size == rebuilt.cell_size
+    for name in ("interior", "keys", "offsets", "zone_ids"):
+        assert np.array_equal(getattr(patched, name), getattr(rebuilt, name))
@@ -0,0 +1,43 @@
+"""Tests of the profile action."""
+
+import pytest
+import voluptuous as vol
+
+from custom_components.polygonal_zones.services.profile import (
+    PROFILE_SCHEMA,
+    _profile,
+)
+from custom_components.polygonal_zones.utils.zone_repository import (
+    ZoneRepository,
+    build_zones,
+)
+
+from .common import square_feature
+
+
+def test_schema_fills_in_the_defaults() -> None:
+    """Test that the options of the profile have their defaults."""
+    data = PROFILE_SCHEMA({"device_id": "tracker", "samples": "50"})
+
+    assert data["device_id"] == ["tracker"]
+    assert (data["samples"], data["jitter"], data["top"]) == (50, 100, 20)
+
+
+@pytest.mark.parametrize(
+    "options", [{"samples": 0}, {"samples": 100001}, {"jitter": -1}, {"top": 0}]
+)
+def test_schema_rejects_out_of_range_options(options: dict) -> None:
+    """Test that the amount of work of a profile is bounded."""
+    with pytest.raises(vol.Invalid):
+        PROFILE_SCHEMA({"device_id": "tracker", **options})
+
+
+def test_profile_looks_up_the_samples() -> None:
+    """Test that the samples around the fixes are generated and looked up."""
+    repository = ZoneRepository([square_feature("a", 5, 52, size=0.1)])
+    _, zones = build_zones(*repository.snapshot())
+
+    report = _profile(zones, [(52.05, 5.05, 0.0)], 30, 10, 5)
+
+    assert report["lookups"] == 30
+    assert report["matched"] == 30
@@ -0,0 +1,88 @@
+"""Tests of the editable zones of a zone file."""
+
+import pytest
+
+from custom_components.polygonal_zones.utils.zone_repository import (
+    ZoneRepository,
+    build_zones,
+)
+from custom_components.polygonal_zones.utils.zone_set import INDEX_GRID
+
+from .common import square_feature
+
+
+def _names(repository: ZoneRepository) -> list[str]:
+    """Get the names of the zones in the order of the file."""
+    features, _ = repository.snapshot()
+    return [feature["properties"]["name"] for feature in features]
+
+
+def test_edits_keep_the_order_of_the_zones() -> None:
+    """Test adding, editing, renaming and deleting zones."""
+    repository = ZoneRepository(
+        [square_feature("a", 5, 52), square_feature("b", 5.1, 52)]
+    )
+
+    assert repository.add(square_feature("c", 5.2, 52)) == "c"
+    assert repository.edit("a", square_feature("a", 5.3, 52, priority=1)) == "a"
+    assert _names(repository) == ["a", "b", "c"]
+
+    assert repository.edit("b", square_feature("d", 5.1, 52)) == "d"
+    repository.delete("a")
+    assert _names(repository) == ["c", "d"]
+    assert len(repository) == 2
+    assert "d" in repository
+    assert "b" not in repository
+
+
+def test_invalid_edits_do_not_change_the_zones() -> None:
+    """Test that the edits that fail leave the zones as they were."""
+    repository = ZoneRepository(
+        [square_feature("a", 5, 52), square_feature("b", 5.1, 52)]
+    )
+
+    with pytest.raises(KeyError):
+        repository.add(square_feature("a", 5.2, 52))
+    with pytest.raises(KeyError):
+        repository.edit("a", square_feature("b", 5.2, 52))
+    with pytest.raises(KeyError):
+        repository.edit("c", square_feature("c", 5.2, 52))
+    with pytest.raises(TypeError):
+        repository.add(square_feature(5, 5.2, 52))
+    with pytest.raises(ValueError):
+        repository.add({"type": "Feature", "properties": {"name": "c"}})
+    with pytest.raises(TypeError):
+        repository.replace([square_feature("c", 5, 52), square_feature(5, 5.1, 52)])
+
+    assert _names(repository) == ["a", "b"]
+
+
+def test_snapshot_is_not_changed_by_later_edits() -> None:
+    """Test that a snapshot can be built while the repository keeps changing."""
+    repository = ZoneRepository([square_feature("a", 5, 52)])
+    features, geometries = repository.snapshot()
+
+    repository.add(square_feature("b", 5.1, 52))
+    repository.delete("a")
+
+    assert [feature["properties"]["name"] for feature in features] == ["a"]
+    assert len(geometries) == 1
+
+
+def test_build_zones_reuses_the_previous_zones() -> None:
+    """Test that the zones built after an edit match the edited features."""
+    repository = ZoneRepository(
+        [square_feature("a", 5, 52), square_feature("b", 5.1, 52, priority=2)]
+    )
+    _, previous = build_zones(*repository.snapshot(), index=INDEX_GRID)
+
+    repository.edit("a", square_feature("a", 5.2, 52))
+    source, zones = build_zones(*repository.snapshot(), INDEX_GRID, previous)
+
+    assert source.digest == ""
+    assert source.names == ["a", "b"]
+    assert source.priorities == [None, 2]
+    assert list(zones.priorities) == [0, 2]
+    assert zones.projected[1] is previous.projected[1]
+    assert zones.projected[0] is not previous.projected[0]
+    assert zones.grid is not None
@@ -0,0 +1,128 @@
+"""Tests of the zones shared by the entities of a config entry."""
+
+import asyncio
+from datetime import timedelta
+import json
+from pathlib import Path
+
+import pytest
+
+from custom_components.polygonal_zones.utils import zone_store
+from custom_components.polygonal_zones.utils.zone_store import ZoneStore
+from homeassistant.core import HomeAssistant
+
+from .common import square_feature, write_zones
+
+
+def _file_names(path: Path) -> list[str]:
+    """Get the names of the zones in a zone file."""
+    features = json.loads(path.read_text(encoding="utf-8"))["features"]
+    return [feature["properties"]["name"] for feature in features]
+
+
+async def test_save_during_reload_is_not_overwritten(
+    hass: HomeAssistant, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that a reload that was running does not undo a save."""
+    path = tmp_path / "zones.json"
+    write_zones(path, [square_feature("a", 5, 52), square_feature("b", 5.1, 52)])
+    store = ZoneStore(hass, ["zones.json"], False, editable=True)
+    updates = []
+
+    async def listener(zones, _changes) -> None:
+        updates.append(sorted(zones.names))
+
+    store.async_add_listener(listener)
+    await store.async_get_zones()
+    repository = await store.async_get_repository()
+
+    # hold the reload while it loads the file
+    loading = asyncio.Event()
+    resume = asyncio.Event()
+    get_zones = zone_store.get_zones
+
+    async def held_get_zones(*args):
+        loading.set()
+        await resume.wait()
+        return await get_zones(*args)
+
+    monkeypatch.setattr(zone_store, "get_zones", held_get_zones)
+    reload = hass.async_create_task(store.async_reload())
+    await loading.wait()
+
+    repository.add(square_feature("c", 5.2, 52))
+    save = hass.async_create_task(store.async_save_repository())
+    await asyncio.sleep(0.1)
+    resume.set()
+    await asyncio.gather(reload, save)
+
+    assert updates == [["a", "b"], ["a", "b", "c"]]
+    assert sorted(store.zones.names) == ["a", "b", "c"]
+    await store.async_flush()
+    assert _file_names(path) == ["a", "b", "c"]
+
+
+async def test_watcher_ignores_the_writes_of_the_store(
+    hass: HomeAssistant, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that only the changes made outside of the store are reloaded."""
+    monkeypatch.setattr(zone_store, "WATCH_INTERVAL", timedelta(seconds=0.05))
+    path = tmp_path / "zones.json"
+    write_zones(path, [square_feature("a", 5, 52)])
+    store = ZoneStore(hass, ["zones.json"], False, editable=True)
+    updates = []
+
+    async def listener(zones, _changes) -> None:
+        updates.append(sorted(zones.names))
+
+    store.async_add_listener(listener)
+    store.async_acquire()
+    await store.async_get_zones()
+    repository = await store.async_get_repository()
+
+    repository.add(square_feature("b", 5.1, 52))
+    await store.async_save_repository()
+    await store.async_flush()
+    await asyncio.sleep(0.3)
+
+    assert updates == [["a", "b"]]
+    assert _file_names(path) == ["a", "b"]
+    assert await store.async_get_repository() is repository
+
+    write_zones(path, [square_feature("c", 5, 52)])
+    await asyncio.sleep(0.3)
+
+    assert updates == [["a", "b"], ["c"]]
+    assert "c" in await store.async_get_repository()
+    store.async_release()
+
+
+async def test_remote_files_are_not_watched(
+    hass: HomeAssistant, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that only stores with local files check them for changes."""
+    watched = []
+
+    def track_time_interval(_hass, action, _interval):
+        watched.append(action)
+        return lambda: watched.remove(action)
+
+    monkeypatch.setattr(zone_store, "async_track_time_interval", track_time_interval)
+    store = ZoneStore(hass, ["https://example.com/zones.json"], False)
+    store.async_acquire()
+    assert not watched
+
+    store.async_update_config(["zones.json"], False)
+    assert len(watched) == 1
+    store.async_update_config([], False)
+    assert not watched
+    store.async_release()
+
+
+async def test_store_without_files(hass: HomeAssistant) -> None:
+    """Test that a store whose uris were all filtered out has no zones."""
+    store = ZoneStore(hass, [], False, editable=True)
+
+    assert len(await store.async_reload()) == 0
+    with pytest.raises(ValueError):
+        await store.async_get_repository()
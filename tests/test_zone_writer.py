@@ -0,0 +1,74 @@
+"""Tests of the background writing of zone files."""
+
+import asyncio
+import hashlib
+import json
+from pathlib import Path
+
+from custom_components.polygonal_zones.utils.zone_writer import ZoneFileWriter
+from homeassistant.core import HomeAssistant
+
+from .common import square_feature
+
+
+async def test_burst_of_changes_is_written_once(
+    hass: HomeAssistant, tmp_path: Path
+) -> None:
+    """Test that only the latest features of a burst are written."""
+    path = tmp_path / "zones.json"
+    written = []
+    writer = ZoneFileWriter(hass, path, lambda *args: written.append(args), delay=0.05)
+
+    first = [square_feature("a", 5, 52)]
+    latest = [*first, square_feature("b", 5.1, 52)]
+    writer.async_schedule(first)
+    await asyncio.sleep(0.02)
+    writer.async_schedule(latest)
+    assert writer.pending
+    assert not path.exists()
+
+    await asyncio.sleep(0.2)
+    await hass.async_block_till_done()
+
+    assert not writer.pending
+    assert len(written) == 1
+    features, digest, stat = written[0]
+    assert features is latest
+    content = path.read_bytes()
+    assert json.loads(content)["features"] == latest
+    assert digest == hashlib.sha256(content).hexdigest()
+    assert stat.st_size == len(content)
+
+
+async def test_flush_writes_right_away(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test that a flush writes the scheduled features without the delay."""
+    path = tmp_path / "zones.json"
+    writer = ZoneFileWriter(hass, path, delay=60)
+
+    await writer.async_flush()
+    assert not path.exists()
+
+    writer.async_schedule([square_feature("a", 5, 52)])
+    await writer.async_flush()
+
+    assert not writer.pending
+    assert len(json.loads(path.read_bytes())["features"]) == 1
+
+
+async def test_failed_write_keeps_the_features(
+    hass: HomeAssistant, tmp_path: Path
+) -> None:
+    """Test that the features of a failed write are written by the next flush."""
+    path = tmp_path / "missing" / "zones.json"
+    written = []
+    writer = ZoneFileWriter(hass, path, lambda *args: written.append(args), delay=60)
+
+    writer.async_schedule([square_feature("a", 5, 52)])
+    await writer.async_flush()
+    assert writer.pending
+    assert not written
+
+    path.parent.mkdir()
+    await writer.async_flush()
+    assert not writer.pending
+    assert len(written) == 1